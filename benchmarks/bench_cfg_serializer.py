@@ -0,0 +1,70 @@
+"""Compare JSON backends on a synthetic 50k-channel provider cfg.
+
+Usage: python benchmarks/bench_cfg_serializer.py [channel_count]
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from m3u_o11.cfg_serializer import BACKENDS, dumps  # noqa: E402
+from m3u_o11.m3u_to_provider_channels_mytvsuper import (  # noqa: E402
+    create_mytvsuper_channel_object,
+    create_provider_object,
+)
+
+
+def make_provider(count):
+    """Build a provider whose channels mix DASH and plain HLS entries."""
+    channels = []
+    for i in range(count):
+        dash = i % 2 == 0
+        channels.append(create_mytvsuper_channel_object({
+            'id': f"ch{i}",
+            'name': f"Channel{i}",
+            'logo': f"https://logo.example.com/{i}.png",
+            'group': "新闻",
+            'url': f"https://cdn.example.com/{i}/manifest.mpd" if dash else f"https://cdn.example.com/{i}/index.m3u8",
+            'manifest_type': "mpd" if dash else "",
+            'license_type': "clearkey" if dash else "",
+            'license_key': f"{i:032x}:{i * 7:032x}" if dash else "",
+        }))
+    return create_provider_object("bench", channels)
+
+
+def bench(label, func):
+    start = time.perf_counter()
+    size = func()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<32} {elapsed:8.3f}s  {size / (1024 * 1024):8.1f} MiB")
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    provider = make_provider(count)
+    print(f"{count} channels, backends: {', '.join(BACKENDS)}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'provider.cfg')
+
+        def legacy_dump():
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(provider, f, ensure_ascii=False, indent=4)
+            return os.path.getsize(path)
+
+        bench("json.dump indent=4 (legacy)", legacy_dump)
+        with open(path, 'rb') as f:
+            legacy_bytes = f.read()
+
+        for backend in BACKENDS:
+            pretty = dumps(provider, compact=False, backend=backend)
+            assert pretty == legacy_bytes, f"{backend} pretty output differs from json.dump"
+            bench(f"{backend} pretty", lambda: len(dumps(provider, compact=False, backend=backend)))
+            bench(f"{backend} compact", lambda: len(dumps(provider, compact=True, backend=backend)))
+
+
+if __name__ == "__main__":
+    main()
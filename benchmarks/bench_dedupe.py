@@ -0,0 +1,57 @@
+"""Per-channel cost of the dedupe stage at growing sizes, to check it stays linear.
+
+Every size is a synthetic o11 export plus a seeded share of mirrored
+copies: the same stream under a "mirror" provider, with the URL's host
+case changed and a default port added, so the normalized URL index has
+to catch them. The us/channel column should stay flat as the size grows.
+
+Usage: python benchmarks/bench_dedupe.py [--sizes 10000,100000,1000000] [--duplicates 0.2] [--seed N]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.playlist_generator import iter_playlist_lines  # noqa: E402
+from m3u_o11.channel_dedupe import DEDUPE_KEYS, dedupe_providers  # noqa: E402
+from m3u_o11.o11_m3u_split_by_group import parse_m3u_by_provider  # noqa: E402
+
+
+def make_providers(count, duplicates, seed):
+    """Parsed providers of a synthetic export with about count * duplicates mirrored channels."""
+    _, providers = parse_m3u_by_provider(iter_playlist_lines(count, seed=seed))
+    rnd = random.Random(seed)
+    mirror = []
+    for channels in providers.values():
+        for extinf, url in channels:
+            if rnd.random() < duplicates:
+                scheme, _, rest = url.partition('://')
+                host, _, path = rest.partition('/')
+                mirror.append((extinf, f"{scheme}://{host.upper()}:443/{path}"))
+    providers['mirror'] = mirror
+    return providers
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python benchmarks/bench_dedupe.py")
+    parser.add_argument('--sizes', default='10000,100000', help="Comma separated export sizes (default: 10000,100000)")
+    parser.add_argument('--duplicates', type=float, default=0.2, help="Share of channels mirrored (default: 0.2)")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    for size in (int(size) for size in args.sizes.split(',')):
+        providers = make_providers(size, args.duplicates, args.seed)
+        for keys in (('url',), ('url', 'tvg-id'), DEDUPE_KEYS):
+            start = time.perf_counter()
+            _, report = dedupe_providers(providers, keys)
+            elapsed = time.perf_counter() - start
+            print(f"{size:>8} {','.join(keys):<16} {elapsed:8.3f}s  "
+                  f"{elapsed / report['channels'] * 1e6:6.2f}us/channel  "
+                  f"collapsed {report['collapsed']}/{report['channels']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Per-line cost of EXTINF attribute parsing on a synthetic 100k-channel playlist.
+
+Usage: python benchmarks/bench_extinf_parser.py [channel_count]
+"""
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.playlist_generator import iter_playlist_lines  # noqa: E402
+from m3u_o11.m3u_parser import parse_extinf_attrs, clean_channel_name  # noqa: E402
+from m3u_o11.o11_m3u_split_by_group import extract_channel_info  # noqa: E402
+
+
+def make_extinf_lines(count):
+    """The #EXTINF lines of a synthetic o11 export."""
+    return [line for line in iter_playlist_lines(count) if line.startswith('#EXTINF:')]
+
+
+def legacy_parse(line):
+    """The per-line work parse_m3u did before the shared tokenizer."""
+    tvg_id = re.search(r'tvg-id="([^"]*)"', line)
+    tvg_name = re.search(r'tvg-name="([^"]*)"', line)
+    tvg_logo = re.search(r'tvg-logo="([^"]*)"', line)
+    tvg_group = re.search(r'group-title="([^"]*)"', line)
+    chars_to_replace = [' ', ',', '.', '!', '-', '(', ')']
+    pattern = '[{}]'.format(re.escape(''.join(chars_to_replace)))
+    return (
+        tvg_id.group(1) if tvg_id else "",
+        re.sub(pattern, '', tvg_name.group(1)) if tvg_name else "",
+        tvg_logo.group(1) if tvg_logo else "",
+        tvg_group.group(1) if tvg_group else "Ungrouped",
+    )
+
+
+def tokenizer_parse(line):
+    """The same fields via the shared single-pass tokenizer."""
+    attrs = parse_extinf_attrs(line)
+    return (
+        attrs.get('tvg-id', ""),
+        clean_channel_name(attrs['tvg-name']) if 'tvg-name' in attrs else "",
+        attrs.get('tvg-logo', ""),
+        attrs.get('group-title', "Ungrouped"),
+    )
+
+
+def bench(label, func, lines):
+    start = time.perf_counter()
+    for line in lines:
+        func(line)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {elapsed:8.3f}s total  {elapsed / len(lines) * 1e6:8.2f}us/line")
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    lines = make_extinf_lines(count)
+    print(f"{count} EXTINF lines")
+
+    bench("legacy re.search x4", legacy_parse, lines)
+    bench("parse_extinf_attrs", tokenizer_parse, lines)
+    bench("extract_channel_info", lambda line: extract_channel_info(line, ""), lines)
+
+
+if __name__ == "__main__":
+    main()
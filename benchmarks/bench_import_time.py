@@ -0,0 +1,115 @@
+"""Cold-start cost of the m3u-o11 commands, measured with python -X importtime.
+
+Each case runs in a fresh interpreter. Besides the import time and wall
+time it checks that no heavy module is loaded where it is not needed
+(requests for a local file, XML for a plain split, ...), and exits with
+status 1 when one is, or when a case imports for longer than --max-ms, so
+it can run as a regression check.
+
+Usage: python benchmarks/bench_import_time.py [--repeat N] [--max-ms MS]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.playlist_generator import write_playlist  # noqa: E402
+
+# Loaded by every command that talks HTTP, parses XML or profiles, never by the others
+HEAVY = ('requests', 'urllib3', 'xml.etree.ElementTree', 'xml.sax.saxutils', 'pstats', 'http.server', 'sqlite3')
+
+
+def cases(tmp):
+    playlist = os.path.join(tmp, 'generic.m3u')
+    export = os.path.join(tmp, 'export.m3u')
+    write_playlist(playlist, 1000, 'generic')
+    write_playlist(export, 1000, 'export')
+    return [
+        # (label, argv, modules that must not be imported)
+        ('--help', ['--help'], HEAVY + ('orjson',)),
+        ('split --help', ['split', '--help'], HEAVY + ('orjson',)),
+        ('convert --help', ['convert', '--help'], HEAVY + ('orjson',)),
+        ('convert-mytvsuper --help', ['convert-mytvsuper', '--help'], HEAVY + ('orjson',)),
+        ('batch --help', ['batch', '--help'], HEAVY + ('orjson',)),
+        ('convert (local file)', ['convert', playlist, 'bench', os.path.join(tmp, 'out.cfg')], HEAVY),
+        ('split (local file)', ['split', export, '--output-dir', os.path.join(tmp, 'split')], HEAVY + ('orjson',)),
+    ]
+
+
+def parse_importtime(stderr):
+    """Return ({module: cumulative us}, [(top level module, cumulative us)], total self us) from -X importtime.
+
+    Only imports after interpreter startup (site and what it loads) count.
+    """
+    modules = {}
+    top_level = []
+    total = 0
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        if name.strip() == 'site' and not name.startswith('  '):
+            modules, top_level, total = {}, [], 0
+            continue
+        modules[name.strip()] = int(cumulative_us)
+        if not name.startswith('  '):
+            top_level.append((name.strip(), int(cumulative_us)))
+        total += int(self_us)
+    return modules, top_level, total
+
+
+def timed_run(command):
+    start = time.perf_counter()
+    result = subprocess.run(command, cwd=ROOT, capture_output=True, text=True)
+    return time.perf_counter() - start, result
+
+
+def run(argv, importtime=False):
+    """Run `python -m m3u_o11 <argv>` in a fresh interpreter, return (seconds, CompletedProcess)."""
+    return timed_run([sys.executable, *(['-X', 'importtime'] if importtime else []), '-m', 'm3u_o11', *argv])
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python benchmarks/bench_import_time.py")
+    parser.add_argument('--repeat', type=int, default=5, help="Best of N wall time runs per case (default: 5)")
+    parser.add_argument('--max-ms', type=float, help="Fail when a case spends longer than this importing")
+    args = parser.parse_args()
+
+    # Baseline: the interpreter alone
+    interpreter = min(timed_run([sys.executable, '-c', 'pass'])[0] for _ in range(args.repeat))
+    print(f"{'python -c pass':<28} wall {interpreter * 1000:7.1f}ms")
+
+    failures = []
+    with tempfile.TemporaryDirectory(prefix='m3u-import-') as tmp:
+        for label, argv, forbidden in cases(tmp):
+            _, result = run(argv, importtime=True)
+            if result.returncode != 0:
+                failures.append(f"{label}: exited with {result.returncode}")
+                continue
+            modules, top_level, total_us = parse_importtime(result.stderr)
+            wall = min(run(argv)[0] for _ in range(args.repeat))
+
+            slowest = sorted(top_level, key=lambda item: item[1], reverse=True)[:3]
+            print(f"{label:<28} wall {wall * 1000:7.1f}ms  imports {total_us / 1000:6.1f}ms  "
+                  f"({', '.join(f'{name} {us / 1000:.1f}ms' for name, us in slowest)})")
+
+            loaded = [name for name in forbidden if name in modules]
+            if loaded:
+                failures.append(f"{label}: imports {', '.join(loaded)}")
+            if args.max_ms is not None and total_us / 1000 > args.max_ms:
+                failures.append(f"{label}: {total_us / 1000:.1f}ms of imports, over {args.max_ms}ms")
+
+    if failures:
+        print("\nRegressions:")
+        for failure in failures:
+            print(f"  {failure}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""Scaling of o11 export parsing across 1/2/4/8 worker processes.
+
+Usage: python benchmarks/bench_parallel_split.py [channel_count]
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.playlist_generator import write_export  # noqa: E402
+from m3u_o11.o11_m3u_split_by_group import (  # noqa: E402
+    open_m3u_file,
+    parse_m3u_by_provider,
+    parse_m3u_file_parallel,
+)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500_000
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'export.m3u')
+        write_export(path, count)
+        print(f"{count} channels, {os.path.getsize(path) / (1024 * 1024):.1f} MiB, {os.cpu_count()} CPUs")
+
+        start = time.perf_counter()
+        expected = parse_m3u_by_provider(open_m3u_file(path))
+        serial = time.perf_counter() - start
+        print(f"{'serial':<12} {serial:8.3f}s")
+
+        for workers in (1, 2, 4, 8):
+            start = time.perf_counter()
+            result = parse_m3u_file_parallel(path, workers)
+            elapsed = time.perf_counter() - start
+            assert result == expected, f"{workers} workers differ from the serial parse"
+            print(f"{workers} workers{'':<4} {elapsed:8.3f}s  x{serial / elapsed:.2f}")
+
+
+if __name__ == "__main__":
+    main()
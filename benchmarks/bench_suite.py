@@ -0,0 +1,208 @@
+"""Fetch, parse, transform and serialize timings of all three pipelines on synthetic playlists.
+
+Each (pipeline, size) case runs in a fresh process so its peak RSS is its
+own; playlists are served by a local HTTP server so fetch time does not
+depend on real upstreams. Results go to a JSON file that --compare can
+diff against a run from another commit.
+
+Usage: python benchmarks/bench_suite.py [--sizes 1000,10000,100000 | --full] [--output results.json]
+                                        [--compare old.json] [--seed N] [--repeat N]
+"""
+import argparse
+import functools
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.playlist_generator import write_playlist  # noqa: E402
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000]
+FULL_SIZES = DEFAULT_SIZES + [1_000_000]
+PIPELINES = {
+    # pipeline -> playlist flavor it consumes
+    'split': 'export',
+    'generic': 'generic',
+    'mytvsuper': 'mytvsuper',
+}
+STAGES = ('fetch', 'parse', 'transform', 'serialize')
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def start_server(directory):
+    """Serve directory on a free local port, return (server, base_url)."""
+    handler = functools.partial(QuietHandler, directory=directory)
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+class CountingSink:
+    """Binary file stand-in that only counts what is written."""
+
+    def __init__(self):
+        self.size = 0
+
+    def write(self, data):
+        self.size += len(data)
+
+
+def timed(timings, stage, func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    timings[stage] = min(timings.get(stage, float('inf')), time.perf_counter() - start)
+    return result
+
+
+def run_case(pipeline, url, cache_dir, repeat):
+    """Run one pipeline against url in this (fresh) process and return its metrics."""
+    from m3u_o11.m3u_fetch import FetchCache
+    from m3u_o11.m3u_parser import iter_m3u_file
+    from m3u_o11.cfg_serializer import write_provider_stream
+
+    timings = {}
+    for run in range(repeat):
+        # A fresh cache every run, so fetch is always a full download
+        cache = FetchCache(os.path.join(cache_dir, f"{pipeline}-{os.getpid()}-{run}"))
+        body_path, _ = timed(timings, 'fetch', cache.fetch, url)
+
+        if pipeline == 'split':
+            from m3u_o11.o11_m3u_split_by_group import parse_m3u_by_provider, render_provider_m3u, SPLIT_HEADER
+
+            _, providers = timed(timings, 'parse', parse_m3u_by_provider, iter_m3u_file(body_path))
+            # Splitting has no separate transform: the #EXTINF rewrite happens while parsing
+            timings['transform'] = 0.0
+            outputs = timed(timings, 'serialize', lambda: [
+                len(render_provider_m3u(SPLIT_HEADER, channels)) for channels in providers.values()
+            ])
+            channels = sum(len(channels) for channels in providers.values())
+        else:
+            if pipeline == 'generic':
+                from m3u_o11.m3u_to_provider_channels import iter_m3u as iter_channels
+                from m3u_o11.o11_templates import create_channel_object as create_channel
+                from m3u_o11.m3u_to_provider_channels import create_provider_object
+            else:
+                from m3u_o11.m3u_to_provider_channels_mytvsuper import iter_mytvsuper_m3u as iter_channels
+                from m3u_o11.o11_templates import create_mytvsuper_channel_object as create_channel
+                from m3u_o11.m3u_to_provider_channels_mytvsuper import create_provider_object
+
+            parsed = timed(timings, 'parse', lambda: list(iter_channels(iter_m3u_file(body_path))))
+            objects = timed(timings, 'transform', lambda: [create_channel(channel) for channel in parsed])
+            # Serialize the way the converters do: streamed channel by channel to a file
+            sink = CountingSink()
+            timed(timings, 'serialize', write_provider_stream, sink, create_provider_object("bench", None), objects)
+            outputs = [sink]
+            channels = len(objects)
+
+    return {
+        'pipeline': pipeline,
+        'channels': channels,
+        'output_bytes': sum(outputs) if pipeline == 'split' else outputs[0].size,
+        **{f"{stage}_s": round(timings[stage], 4) for stage in STAGES},
+        'total_s': round(sum(timings[stage] for stage in STAGES), 4),
+        # ru_maxrss is KiB on Linux, bytes on macOS
+        'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+                             / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1),
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline_path):
+    """Print each case's total time against the same case in a previous results file."""
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    previous = {(row['pipeline'], row['size']): row for row in baseline['results']}
+
+    print(f"\nSpeedup compared with {baseline_path} ({baseline.get('revision')}), above x1.00 is faster:")
+    for row in results:
+        old = previous.get((row['pipeline'], row['size']))
+        if old is None:
+            continue
+        changes = [f"{stage} x{old[f'{stage}_s'] / row[f'{stage}_s']:.2f}" for stage in STAGES
+                   if row[f'{stage}_s'] and old[f'{stage}_s']]
+        print(f"  {row['pipeline']:<10} {row['size']:>9}  total x{old['total_s'] / row['total_s']:.2f} "
+              f"({', '.join(changes)}), rss {old['peak_rss_mb']} -> {row['peak_rss_mb']} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python benchmarks/bench_suite.py")
+    parser.add_argument('--sizes', default=','.join(map(str, DEFAULT_SIZES)),
+                        help="Comma separated channel counts (default: 1000,10000,100000)")
+    parser.add_argument('--full', action='store_true', help="Also run 1M channels (needs several GB of RAM)")
+    parser.add_argument('--pipelines', default=','.join(PIPELINES), help="Comma separated: split,generic,mytvsuper")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=3, help="Best of N runs per stage (default: 3)")
+    parser.add_argument('--output', default='bench_results.json')
+    parser.add_argument('--compare', help="Previous results JSON to compare against")
+    args = parser.parse_args()
+
+    sizes = FULL_SIZES if args.full else [int(size) for size in args.sizes.split(',')]
+    pipelines = args.pipelines.split(',')
+    results = []
+
+    with tempfile.TemporaryDirectory(prefix='m3u-bench-') as tmp:
+        server, base_url = start_server(tmp)
+        context = multiprocessing.get_context('spawn')
+        try:
+            for size in sizes:
+                for pipeline in pipelines:
+                    filename = f"{PIPELINES[pipeline]}-{size}.m3u"
+                    path = os.path.join(tmp, filename)
+                    if not os.path.exists(path):
+                        write_playlist(path, size, PIPELINES[pipeline], args.seed)
+
+                    with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                        row = executor.submit(run_case, pipeline, f"{base_url}/{filename}", tmp, args.repeat).result()
+                    row['size'] = size
+                    row['input_bytes'] = os.path.getsize(path)
+                    results.append(row)
+                    print(
+                        f"{pipeline:<10} {size:>9}  fetch {row['fetch_s']:7.3f}s  parse {row['parse_s']:7.3f}s  "
+                        f"transform {row['transform_s']:7.3f}s  serialize {row['serialize_s']:7.3f}s  "
+                        f"rss {row['peak_rss_mb']:7.1f} MB",
+                        flush=True,
+                    )
+        finally:
+            server.shutdown()
+
+    report = {
+        'revision': git_revision(),
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'seed': args.seed,
+        'repeat': args.repeat,
+        'results': results,
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=4)
+    print(f"\nResults saved to {args.output}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""Seeded synthetic playlists shaped like o11 exports and upstream provider lists.
+
+Usage: python benchmarks/playlist_generator.py <output> <channel_count> [--flavor export|generic|mytvsuper] [--seed N]
+"""
+import argparse
+import os
+import random
+
+PROVIDERS = [
+    # (name, weight, DASH with KODIPROP blocks)
+    ('hami', 6, False),
+    ('mytvsuper', 4, True),
+    ('4gtv', 5, False),
+    ('litv', 3, False),
+    ('friday', 2, False),
+    ('ofiii', 2, False),
+    ('nowtv', 1, True),
+]
+
+GROUPS = ['新闻', '综合', 'Sports', 'Movies', 'Kids', 'Drama', '纪录', 'Music', 'International']
+NAME_WORDS = ['TVB', 'Jade', 'Pearl', 'CCTV', '東森', '中天', 'FOX', 'HBO', 'Discovery', 'Animax',
+              'Star', 'Sky', 'ViuTV', '民視', '台視', 'Now', 'beIN', 'ELTA', 'Eurosport', 'NHK']
+NAME_SUFFIXES = ['', '', '', ' HD', ' (HD)', ' 4K', '!', ' Plus', '.']
+CDN_HOSTS = [f"cdn{i}.example.com" for i in range(12)] + ['live.example.net', 'edge.example.org']
+
+
+class PlaylistGenerator:
+    """Produce the same channels for the same seed and count."""
+
+    def __init__(self, seed=0):
+        self.random = random.Random(seed)
+        self.weights = [weight for _, weight, _ in PROVIDERS]
+
+    def channel(self, i):
+        """Return one channel dict with its provider, group, names, ids and URL."""
+        rnd = self.random
+        provider, _, dash = rnd.choices(PROVIDERS, self.weights)[0]
+        name = f"{rnd.choice(NAME_WORDS)} {rnd.randint(1, 99)}{rnd.choice(NAME_SUFFIXES)}"
+        host = rnd.choice(CDN_HOSTS)
+        if dash:
+            url = f"https://{host}/{provider}/{i}/manifest.mpd"
+        else:
+            url = f"https://{host}/{provider}/{i}/index.m3u8?token={rnd.getrandbits(64):016x}"
+        return {
+            'provider': provider,
+            'group': rnd.choice(GROUPS),
+            'name': name,
+            'id': f"{provider.upper()}{i}",
+            'logo': f"https://logo.example.com/{provider}/{i}.png",
+            'url': url,
+            'dash': dash,
+            'kid': f"{rnd.getrandbits(128):032x}",
+            'key': f"{rnd.getrandbits(128):032x}",
+        }
+
+    def kodiprops(self, channel):
+        return [
+            "#KODIPROP:inputstream.adaptive.manifest_type=mpd",
+            "#KODIPROP:inputstream.adaptive.license_type=clearkey",
+            f"#KODIPROP:inputstream.adaptive.license_key={channel['kid']}:{channel['key']}",
+        ]
+
+    def iter_export_lines(self, count):
+        """Lines of an o11 export: provider-prefixed tvg-ids and '[prov] Group - Name' titles."""
+        yield '#EXTM3U x-tvg-url="https://assets.livednow.com/epg.xml"'
+        for i in range(count):
+            channel = self.channel(i)
+            provider = channel['provider']
+            yield (
+                f'#EXTINF:-1 tvg-id="{provider}/{channel["id"]}" tvg-name="{channel["name"]}" '
+                f'tvg-logo="{channel["logo"]}" group-title="{provider}" provider="{provider}",'
+                f'[{provider}] {channel["group"]} - {channel["name"]}'
+            )
+            if channel['dash']:
+                yield from self.kodiprops(channel)
+            yield channel['url']
+
+    def iter_provider_lines(self, count, kodiprop=False):
+        """Lines of an upstream provider playlist, as fed to the cfg converters."""
+        yield '#EXTM3U'
+        for i in range(count):
+            channel = self.channel(i)
+            yield (
+                f'#EXTINF:-1 tvg-id="{channel["id"]}" tvg-name="{channel["name"]}" '
+                f'tvg-logo="{channel["logo"]}" group-title="{channel["group"]}",{channel["name"]}'
+            )
+            if kodiprop and channel['dash']:
+                yield from self.kodiprops(channel)
+            yield channel['url']
+
+
+def iter_playlist_lines(count, flavor='export', seed=0):
+    generator = PlaylistGenerator(seed)
+    if flavor == 'export':
+        return generator.iter_export_lines(count)
+    return generator.iter_provider_lines(count, kodiprop=flavor == 'mytvsuper')
+
+
+def write_playlist(path, count, flavor='export', seed=0):
+    """Write a synthetic playlist and return its size in bytes."""
+    with open(path, 'w', encoding='utf-8', newline='\n') as f:
+        for line in iter_playlist_lines(count, flavor, seed):
+            f.write(line + '\n')
+    return os.path.getsize(path)
+
+
+def write_export(path, count, seed=0):
+    """Write a synthetic o11 export with count channels."""
+    return write_playlist(path, count, 'export', seed)
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python benchmarks/playlist_generator.py")
+    parser.add_argument('output')
+    parser.add_argument('count', type=int)
+    parser.add_argument('--flavor', choices=['export', 'generic', 'mytvsuper'], default='export')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    write_playlist(args.output, args.count, args.flavor, args.seed)
+
+
+if __name__ == "__main__":
+    main()
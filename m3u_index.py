@@ -0,0 +1,5 @@
+"""Same as `m3u-o11 index`, kept so existing cron jobs and scripts keep working."""
+from m3u_o11.cli import run
+
+if __name__ == "__main__":
+    run('index')
@@ -0,0 +1,4 @@
+"""Convert provider playlists into o11 cfgs and split o11 exports by provider.
+
+Run ``m3u-o11 --help`` (or ``python -m m3u_o11 --help``) for the commands.
+"""
@@ -0,0 +1,42 @@
+import contextlib
+import os
+import tempfile
+
+
+# mkstemp creates files as 0600, outputs get the usual umask-based mode instead
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+def make_temp(path):
+    """Create a temp file next to path, return (fd, temp path)."""
+    directory = os.path.dirname(os.path.abspath(path))
+    return tempfile.mkstemp(dir=directory, prefix='.', suffix='.tmp')
+
+
+def replace_with_temp(tmp_path, path):
+    """Give a finished temp file the usual mode and rename it over path."""
+    os.chmod(tmp_path, 0o666 & ~_UMASK)
+    os.replace(tmp_path, path)
+
+
+@contextlib.contextmanager
+def atomic_open(path, buffering=-1):
+    """Open a temp file next to path for binary writing and rename it over path on success.
+
+    Readers such as o11 never see a half-written file.
+    """
+    fd, tmp_path = make_temp(path)
+    try:
+        with os.fdopen(fd, 'wb', buffering=buffering) as f:
+            yield f
+        replace_with_temp(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def atomic_write(path, data):
+    """Write bytes to path through a temp file and rename."""
+    with atomic_open(path) as f:
+        f.write(data)
@@ -0,0 +1,181 @@
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from . import m3u_to_provider_channels
+from . import m3u_to_provider_channels_mytvsuper
+from .m3u_fetch import DEFAULT_TIMEOUT, FetchCache, add_fetch_arguments, create_session, fetch_cache_from_args
+from .m3u_parser import iter_m3u_file
+from .stream_probe import add_probe_arguments, prober_from_args
+
+
+# flavor -> convert_m3u_lines(lines, provider_name, output_file, incremental, report_file, compact, probe)
+FLAVORS = {
+    'generic': m3u_to_provider_channels.convert_m3u_lines,
+    'mytvsuper': m3u_to_provider_channels_mytvsuper.convert_m3u_lines,
+}
+
+
+def read_jobs(filepath):
+    """Read jobs as (url, provider, output, flavor), one per line.
+
+    Each line is ``<m3u_url> <provider_name> <output_file> [flavor]``;
+    blank lines and lines starting with '#' are ignored.
+    """
+    jobs = []
+    with open(filepath, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+
+            parts = line.split()
+            if len(parts) not in (3, 4):
+                print(f"Invalid job on line {line_number}: {line}")
+                sys.exit(1)
+
+            url, provider, output = parts[:3]
+            flavor = parts[3] if len(parts) == 4 else 'generic'
+            if flavor not in FLAVORS:
+                print(f"Unknown flavor '{flavor}' on line {line_number}, expected one of: {', '.join(FLAVORS)}")
+                sys.exit(1)
+
+            jobs.append((url, provider, output, flavor))
+    return jobs
+
+
+class BatchFetcher:
+    """Fetch each distinct URL of a batch once, sharing the outcome between its jobs.
+
+    Jobs on the same URL wait for the first one's fetch and get the same
+    (body_path, changed) or the same error. Bodies are not evicted while
+    the batch runs, see FetchCache.fetch().
+    """
+
+    def __init__(self, cache, session, timeout):
+        self.cache = cache
+        self.session = session
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._url_locks = {}
+        self._results = {}
+
+    def fetch(self, url):
+        with self._lock:
+            url_lock = self._url_locks.setdefault(url, threading.Lock())
+        with url_lock:
+            if url not in self._results:
+                try:
+                    self._results[url] = (self.cache.fetch(url, session=self.session, timeout=self.timeout,
+                                                           evict=False), None)
+                except Exception as e:
+                    self._results[url] = (None, e)
+        result, error = self._results[url]
+        if error is not None:
+            raise error
+        return result
+
+
+def run_job(job, fetcher, incremental, compact, probe=None):
+    """Fetch, convert and write one job, returning its result row."""
+    import requests
+
+    url, provider, output, flavor = job
+    result = {'provider': provider, 'output': output, 'flavor': flavor,
+              'fetch': 0.0, 'convert': 0.0, 'channels': 0, 'changed': None, 'error': None}
+
+    try:
+        start = time.perf_counter()
+        if os.path.isfile(url):
+            body_path, result['changed'] = url, True
+        else:
+            body_path, result['changed'] = fetcher.fetch(url)
+        result['fetch'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        report_file = f"{output}.patch.json" if incremental else None
+        result['channels'] = FLAVORS[flavor](
+            iter_m3u_file(body_path), provider, output, incremental, report_file, compact, probe
+        )
+        result['convert'] = time.perf_counter() - start
+    except (requests.RequestException, OSError, ValueError) as e:
+        result['error'] = str(e)
+
+    return result
+
+
+def batch_convert(jobs, cache=None, workers=8, timeout=DEFAULT_TIMEOUT, incremental=False, compact=False, probe=None):
+    """Run all jobs concurrently over one pooled session and return result rows."""
+    temp_dir = None
+    if cache is None:
+        # Bodies are spooled to disk so fetch and convert time are measured apart
+        temp_dir = tempfile.mkdtemp(prefix='m3u-batch-')
+        cache = FetchCache(temp_dir, max_bytes=sys.maxsize)
+
+    try:
+        with create_session(workers) as session, ThreadPoolExecutor(max_workers=workers) as executor:
+            fetcher = BatchFetcher(cache, session, timeout)
+            futures = [executor.submit(run_job, job, fetcher, incremental, compact, probe) for job in jobs]
+            return [future.result() for future in futures]
+    finally:
+        if temp_dir:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+        else:
+            # Every body has been read, trim the cache back to its size limit
+            cache.evict()
+
+
+def print_summary(results, elapsed):
+    """Print per-job timings and the overall wall time."""
+    print("\nSummary:")
+    print(f"  {'provider':<20} {'flavor':<10} {'channels':>8} {'fetch':>8} {'convert':>8}  status")
+    for result in results:
+        if result['error']:
+            status = f"error: {result['error']}"
+        elif result['changed'] is False:
+            status = "ok (not modified)"
+        else:
+            status = "ok"
+        print(
+            f"  {result['provider']:<20} {result['flavor']:<10} {result['channels']:>8} "
+            f"{result['fetch']:>7.2f}s {result['convert']:>7.2f}s  {status}"
+        )
+
+    slowest = max((r['fetch'] + r['convert'] for r in results), default=0.0)
+    total = sum(r['fetch'] + r['convert'] for r in results)
+    print(f"\nJobs: {len(results)}, failed: {sum(1 for r in results if r['error'])}")
+    print(f"Wall time: {elapsed:.2f}s (slowest job {slowest:.2f}s, sequential sum {total:.2f}s)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="m3u-o11 batch")
+    parser.add_argument('jobs_file', help="File with one '<m3u_url> <provider_name> <output_file> [flavor]' per line")
+    parser.add_argument('--workers', type=int, default=8, help="Concurrent jobs and pooled connections (default: 8)")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Patch existing outputs and write <output_file>.patch.json reports")
+    parser.add_argument('--compact', action='store_true', help="Write compact JSON without indentation")
+    add_fetch_arguments(parser)
+    add_probe_arguments(parser)
+    args = parser.parse_args(argv)
+
+    jobs = read_jobs(args.jobs_file)
+
+    start = time.perf_counter()
+    results = batch_convert(
+        jobs,
+        cache=fetch_cache_from_args(args),
+        workers=args.workers,
+        timeout=args.timeout,
+        incremental=args.incremental,
+        compact=args.compact,
+        probe=prober_from_args(args),
+    )
+    print_summary(results, time.perf_counter() - start)
+
+    if any(result['error'] for result in results):
+        sys.exit(1)
@@ -0,0 +1,124 @@
+import json
+from collections import Counter
+
+from .cfg_serializer import write_json
+
+
+def load_provider_cfg(path):
+    """Load an existing provider cfg, or None when it does not exist yet."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def index_channels(channels):
+    """Index channels by (Id, Manifest); exact repeats are told apart by occurrence.
+
+    Keying on the Manifest too means removing one of several channels that
+    share an Id, or have none, does not shift the keys of the others.
+    """
+    index = {}
+    seen = {}
+    for channel in channels:
+        identity = (channel.get('Id', ""), channel.get('Manifest', ""))
+        occurrence = seen.get(identity, 0)
+        seen[identity] = occurrence + 1
+        index[(*identity, occurrence)] = channel
+    return index
+
+
+def changed_fields(old_channel, new_channel):
+    return {field: value for field, value in new_channel.items() if old_channel.get(field) != value}
+
+
+def diff_channels(old_channels, new_channels):
+    """Diff two channel lists keyed by Id and Manifest.
+
+    Returns a dict with the ``added`` channel objects, the ``removed`` keys
+    and, for ``changed`` channels, only the fields whose values differ. A
+    channel whose Manifest moved is still one change when its Id is the
+    only one of its kind among the removed and added channels.
+    """
+    old_index = index_channels(old_channels)
+    new_index = index_channels(new_channels)
+
+    added = [(key, channel) for key, channel in new_index.items() if key not in old_index]
+    removed = [key for key in old_index if key not in new_index]
+    changed = {}
+    for key, new_channel in new_index.items():
+        old_channel = old_index.get(key)
+        if old_channel is not None:
+            fields = changed_fields(old_channel, new_channel)
+            if fields:
+                changed[key] = fields
+
+    # Pair a lone removed and added channel with the same Id as a change
+    removed_ids = Counter(key[0] for key in removed)
+    added_ids = Counter(key[0] for key, _ in added)
+    old_keys = {key[0]: key for key in removed if removed_ids[key[0]] == 1}
+    moved = set()
+    for key, new_channel in added:
+        old_key = old_keys.get(key[0])
+        if key[0] and old_key and added_ids[key[0]] == 1:
+            changed[old_key] = changed_fields(old_index[old_key], new_channel)
+            moved.update((key, old_key))
+    added = [(key, channel) for key, channel in added if key not in moved]
+    removed = [key for key in removed if key not in moved]
+
+    return {'added': added, 'removed': removed, 'changed': changed}
+
+
+def apply_channel_diff(old_channels, diff):
+    """Patch old channels in place order: drop removed, update changed, append added."""
+    removed = set(diff['removed'])
+    patched = []
+    for key, channel in index_channels(old_channels).items():
+        if key in removed:
+            continue
+        fields = diff['changed'].get(key)
+        if fields:
+            # Fields the generator does not produce (edited in o11) are kept
+            channel = {**channel, **fields}
+        patched.append(channel)
+    patched.extend(channel for _, channel in diff['added'])
+    return patched
+
+
+def diff_report(diff):
+    """Build a JSON-serializable patch report from a diff."""
+    return {
+        'added': [channel for _, channel in diff['added']],
+        'removed': [channel_id or manifest for channel_id, manifest, _ in diff['removed']],
+        'changed': [
+            {'Id': channel_id or manifest, 'Fields': fields}
+            for (channel_id, manifest, _), fields in diff['changed'].items()
+        ],
+    }
+
+
+def update_provider_cfg(output_file, provider, report_file=None, compact=False):
+    """Patch output_file with only the channels that differ from provider.
+
+    The existing provider settings are kept; the file is rewritten only
+    when channels were added, removed or changed. Returns the diff.
+    """
+    old_provider = load_provider_cfg(output_file)
+    old_channels = (old_provider.get('Channels') or []) if old_provider else []
+    diff = diff_channels(old_channels, provider['Channels'])
+
+    if old_provider is None:
+        write_json(output_file, provider, compact=compact)
+    elif diff['added'] or diff['removed'] or diff['changed']:
+        old_provider['Channels'] = apply_channel_diff(old_channels, diff)
+        write_json(output_file, old_provider, compact=compact)
+
+    if report_file:
+        write_json(report_file, diff_report(diff))
+
+    print(
+        f"{output_file}: {len(diff['added'])} added, {len(diff['removed'])} removed, "
+        f"{len(diff['changed'])} changed"
+    )
+    return diff
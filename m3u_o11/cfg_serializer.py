@@ -0,0 +1,134 @@
+import importlib.util
+import json
+import re
+
+from .atomic_io import atomic_open, atomic_write
+
+
+def _dumps_stdlib(obj, compact):
+    if compact:
+        return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    return json.dumps(obj, ensure_ascii=False, indent=4).encode('utf-8')
+
+
+def _dumps_orjson(obj, compact):
+    import orjson
+
+    if compact:
+        return orjson.dumps(obj)
+
+    # orjson only indents by 2 spaces: double the indentation level by level,
+    # deepest first, to match json.dump(indent=4) byte for byte. JSON strings
+    # cannot contain raw newlines, so only indentation follows a b'\n'.
+    data = orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+    depth = 0
+    while b'\n' + b'  ' * (depth + 1) in data:
+        depth += 1
+    for level in range(depth, 0, -1):
+        data = re.sub(b'\n' + b'  ' * level + b'(?! )', b'\n' + b'    ' * level, data)
+    return data
+
+
+def _dumps_msgspec(obj, compact):
+    if not compact:
+        return _dumps_stdlib(obj, compact)
+    import msgspec.json
+
+    return msgspec.json.encode(obj)
+
+
+# Installed backends are found without importing them; each one is only
+# imported by its first dumps() call
+BACKENDS = {'stdlib': _dumps_stdlib}
+if importlib.util.find_spec('orjson') is not None:
+    BACKENDS['orjson'] = _dumps_orjson
+if importlib.util.find_spec('msgspec') is not None:
+    BACKENDS['msgspec'] = _dumps_msgspec
+
+
+def default_backend():
+    """Return the fastest installed backend name."""
+    for name in ('orjson', 'msgspec'):
+        if name in BACKENDS:
+            return name
+    return 'stdlib'
+
+
+def dumps(obj, compact=False, backend=None):
+    """Serialize obj to UTF-8 JSON bytes.
+
+    Pretty output is byte-identical to json.dump(obj, ensure_ascii=False,
+    indent=4) and uses orjson when installed; compact output has no
+    whitespace and uses orjson or msgspec when installed.
+    """
+    return BACKENDS[backend or default_backend()](obj, compact)
+
+
+def write_json(path, obj, compact=False, backend=None):
+    """Write obj as JSON through a temp file and rename, so readers never see a partial file."""
+    atomic_write(path, dumps(obj, compact=compact, backend=backend))
+
+
+class ProviderStreamWriter:
+    """Write a provider cfg to a binary file while its channels are produced.
+
+    The provider fields are written first, then each channel as soon as it
+    is passed to write_channel(), so the Channels list is never held in
+    memory. The output is identical to dumps() of the full provider.
+    """
+
+    def __init__(self, f, provider, compact=False, backend=None):
+        if next(reversed(provider)) != 'Channels':
+            raise ValueError("Channels must be the last provider field")
+        self.f = f
+        self.compact = compact
+        self.backend = backend
+        self.count = 0
+
+        head = dumps({**provider, 'Channels': []}, compact=compact, backend=backend)
+        # Cut the empty list and closing brace: b'[]}' or b'[]\n}'
+        tail = b'[]}' if compact else b'[]\n}'
+        f.write(head[:-len(tail)] + b'[')
+
+    def write_channel(self, channel):
+        data = dumps(channel, compact=self.compact, backend=self.backend)
+        if self.compact:
+            if self.count:
+                data = b',' + data
+        else:
+            # Nest the channel two levels deep, as inside provider['Channels']
+            data = (b',\n        ' if self.count else b'\n        ') + data.replace(b'\n', b'\n        ')
+        self.f.write(data)
+        self.count += 1
+
+    def close(self):
+        if self.compact:
+            self.f.write(b']}')
+        else:
+            self.f.write(b'\n    ]\n}' if self.count else b']\n}')
+        return self.count
+
+
+def write_provider_stream(f, provider, channels, compact=False, backend=None, stats=None):
+    """Stream provider with the channels iterable as its Channels, return the count.
+
+    With a PipelineStats, encoding is charged to its 'serialize' stage and
+    file writes to 'write'.
+    """
+    if stats is not None:
+        f = stats.timed_writer(f, 'write')
+        with stats.stage('serialize') as stage:
+            count = write_provider_stream(f, provider, channels, compact=compact, backend=backend)
+            stage['items'] += count
+        return count
+
+    writer = ProviderStreamWriter(f, provider, compact=compact, backend=backend)
+    for channel in channels:
+        writer.write_channel(channel)
+    return writer.close()
+
+
+def write_provider_cfg_stream(path, provider, channels, compact=False, backend=None, stats=None):
+    """Stream a provider cfg to path through a temp file and rename, return the channel count."""
+    with atomic_open(path, buffering=1024 * 1024) as f:
+        return write_provider_stream(f, provider, channels, compact=compact, backend=backend, stats=stats)
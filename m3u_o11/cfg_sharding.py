@@ -0,0 +1,218 @@
+import argparse
+import json
+import math
+import os
+import re
+import sys
+
+from .cfg_serializer import write_json, write_provider_cfg_stream
+
+
+# Kb/s assumed for channels whose track list gives no bitrate
+DEFAULT_BITRATES = {'dash': 8000, 'hls': 4000}
+DEFAULT_LOAD_FACTOR = 1.25
+
+BITRATE_PATTERN = re.compile(r'(\d+)Kb/s')
+
+
+def channel_key(channel):
+    """Stable identity of a channel object across runs."""
+    return channel['Id'] or channel['Manifest']
+
+
+def estimate_bitrate(channel):
+    """Kb/s of the channel's best video track, or a default for its manifest type."""
+    best = 0
+    for track in channel.get('VideoList') or ():
+        match = BITRATE_PATTERN.search(track.get('Desc') or "")
+        if match:
+            best = max(best, int(match.group(1)))
+    if best:
+        return best
+    dash = channel.get('ManifestType') == 'dash' or '.mpd' in channel['Manifest']
+    return DEFAULT_BITRATES['dash' if dash else 'hls']
+
+
+def load_viewers(path):
+    """Read a CSV of `channel id or name, viewers` rows into a dict, skipping a header row."""
+    import csv
+
+    viewers = {}
+    try:
+        with open(path, newline='', encoding='utf-8') as f:
+            for row in csv.reader(f):
+                if len(row) < 2:
+                    continue
+                try:
+                    viewers[row[0].strip()] = float(row[1])
+                except ValueError:
+                    continue
+    except OSError as e:
+        print(f"Error reading viewers CSV: {e}")
+        sys.exit(1)
+    return viewers
+
+
+def rendezvous_score(node, key, share):
+    """Weighted rendezvous (HRW) score of key on node, higher wins."""
+    import hashlib
+
+    digest = hashlib.blake2b(f"{node}\0{key}".encode('utf-8'), digest_size=8).digest()
+    # Map the hash into (0, 1) and weight it so nodes win in proportion to their share
+    unit = (int.from_bytes(digest, 'big') + 1) / (2 ** 64 + 1)
+    return -share / math.log(unit)
+
+
+def assign_shards(keys, weights, nodes, shares, load_factor=DEFAULT_LOAD_FACTOR, previous=None):
+    """Assign each key to a node index with rendezvous hashing and bounded load.
+
+    A node takes at most load_factor times its share of the total weight.
+    A key goes to its previous node (from previous, {key: node}) when that
+    node still has room, otherwise to the highest scoring node with room,
+    so adding weight or nodes moves as few keys as possible. Keys are
+    placed heaviest first; one that fits nowhere goes to the least loaded
+    node.
+    """
+    total = sum(weights)
+    share_total = sum(shares)
+    capacity = [total * share / share_total * load_factor for share in shares]
+    node_index = {node: index for index, node in enumerate(nodes)}
+    load = [0.0] * len(nodes)
+    assignment = [0] * len(keys)
+
+    for i in sorted(range(len(keys)), key=lambda i: (-weights[i], keys[i])):
+        key, weight = keys[i], weights[i]
+        ranked = sorted(range(len(nodes)), key=lambda n: rendezvous_score(nodes[n], key, shares[n]), reverse=True)
+        sticky = node_index.get((previous or {}).get(key))
+        if sticky is not None:
+            ranked.remove(sticky)
+            ranked.insert(0, sticky)
+        node = next((n for n in ranked if load[n] + weight <= capacity[n]), None)
+        if node is None:
+            node = min(range(len(nodes)), key=lambda n: load[n] / shares[n])
+        load[node] += weight
+        assignment[i] = node
+    return assignment, load
+
+
+def shard_path(output_file, index):
+    root, ext = os.path.splitext(output_file)
+    return f"{root}-{index + 1}{ext}"
+
+
+class CfgSharder:
+    """Split one provider's channels into per-node provider cfgs.
+
+    Channels are weighted by their estimated bitrate, times one plus their
+    viewer count when a viewers CSV is given, so unwatched channels still
+    cost one stream. max_streams is one MaxConcurrentStreams for every shard
+    or one per shard; different per-shard values also size each node's
+    share of the load. With state_file, the last assignment is reused for
+    every channel whose node still has room.
+    """
+
+    def __init__(self, shards, max_streams=None, viewers_file=None, state_file=None,
+                 load_factor=DEFAULT_LOAD_FACTOR):
+        self.shards = shards
+        self.max_streams = max_streams or [0]
+        self.viewers = load_viewers(viewers_file) if viewers_file else None
+        self.state_file = state_file
+        self.load_factor = load_factor
+
+    def weight(self, channel):
+        bitrate = estimate_bitrate(channel)
+        if self.viewers is None:
+            return bitrate
+        viewers = self.viewers.get(channel['Id'], self.viewers.get(channel['Name'], 0))
+        return bitrate * (1 + max(viewers, 0))
+
+    def load_state(self, nodes):
+        """Return the saved {channel key: node}, or {} when the nodes changed since it was saved.
+
+        When nodes are added or removed, rendezvous hashing alone already
+        moves only the channels that must move.
+        """
+        if not self.state_file or not os.path.exists(self.state_file):
+            return {}
+        try:
+            with open(self.state_file, 'rb') as f:
+                state = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Ignoring shard state {self.state_file}: {e}")
+            return {}
+        if state.get('nodes') != nodes:
+            return {}
+        return state.get('channels') or {}
+
+    def write(self, output_file, provider_name, channels, create_provider, compact=False):
+        """Write the shard cfgs next to output_file, return the channel count per shard file."""
+        nodes = [f"{provider_name}-{index + 1}" for index in range(self.shards)]
+        max_streams = self.max_streams * self.shards if len(self.max_streams) == 1 else self.max_streams
+        shares = max_streams if len(set(max_streams)) > 1 and all(max_streams) else [1] * self.shards
+
+        keys = [channel_key(channel) for channel in channels]
+        weights = [self.weight(channel) for channel in channels]
+        previous = self.load_state(nodes)
+        assignment, load = assign_shards(keys, weights, nodes, shares, self.load_factor, previous)
+
+        shards = [[] for _ in nodes]
+        for channel, node in zip(channels, assignment):
+            shards[node].append(channel)
+
+        total = sum(load) or 1
+        counts = {}
+        for index, node in enumerate(nodes):
+            provider = create_provider(node, None)
+            provider["MaxConcurrentStreams"] = max_streams[index]
+            path = shard_path(output_file, index)
+            counts[path] = write_provider_cfg_stream(path, provider, shards[index], compact=compact)
+            print(f"{path}: {counts[path]} channels, {load[index] / total:.0%} of the load, "
+                  f"MaxConcurrentStreams {max_streams[index]}")
+
+        if self.state_file:
+            state = {key: nodes[node] for key, node in zip(keys, assignment)}
+            write_json(self.state_file, {'nodes': nodes, 'channels': state})
+            if previous:
+                moved = sum(1 for key, node in state.items() if key in previous and previous[key] != node)
+                print(f"Shard state saved to {self.state_file}, {moved} channels moved")
+            else:
+                print(f"Shard state saved to {self.state_file}")
+        return counts
+
+
+def parse_max_streams(value):
+    try:
+        streams = [int(part) for part in value.split(',')]
+    except ValueError:
+        raise argparse.ArgumentTypeError("expected N or a comma separated N per shard")
+    if any(stream < 0 for stream in streams):
+        raise argparse.ArgumentTypeError("stream limits must not be negative")
+    return streams
+
+
+def add_shard_arguments(parser):
+    """Add the cfg sharding options to an argparse parser."""
+    parser.add_argument('--shards', type=int,
+                        help="Split the channels into this many <output>-<n>.cfg providers, one per o11 node")
+    parser.add_argument('--shard-max-streams', type=parse_max_streams, metavar='N[,N...]',
+                        help="MaxConcurrentStreams of every shard, or one per shard; uneven limits also "
+                             "size each shard's share of the load (default: 0, unlimited)")
+    parser.add_argument('--shard-viewers', metavar='CSV',
+                        help="Weight channels by viewer counts from a `channel id or name,viewers` CSV")
+    parser.add_argument('--shard-state',
+                        help="Keep channel to shard assignments in this JSON file so they stay put between runs")
+    parser.add_argument('--shard-load-factor', type=float, default=DEFAULT_LOAD_FACTOR,
+                        help=f"Most load a shard takes, relative to its fair share (default: {DEFAULT_LOAD_FACTOR})")
+
+
+def sharder_from_args(args):
+    """Build a CfgSharder from parsed arguments, or None when sharding is off."""
+    if not args.shards:
+        return None
+    return CfgSharder(
+        args.shards,
+        max_streams=args.shard_max_streams,
+        viewers_file=args.shard_viewers,
+        state_file=args.shard_state,
+        load_factor=args.shard_load_factor,
+    )
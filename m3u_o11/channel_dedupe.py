@@ -0,0 +1,171 @@
+import argparse
+import json
+import re
+
+from .atomic_io import atomic_open
+from .m3u_parser import split_extinf
+
+
+DEDUPE_KEYS = ('url', 'tvg-id', 'name')
+DEFAULT_DEDUPE_KEYS = ('url', 'tvg-id')
+
+DEFAULT_PORT_SUFFIXES = {'http': ':80', 'https': ':443'}
+
+NAME_KEY_PATTERN = re.compile(r'[\W_]+')
+
+# First tvg-id attribute, the one parse_extinf_attrs() returns
+TVG_ID_PATTERN = re.compile(r'(?<![\w-])tvg-id="([^"]*)"')
+
+
+def normalize_url(url, ignore_params=frozenset()):
+    """Comparison key of a stream URL: lowercase scheme and host, no default port or fragment, sorted query.
+
+    Only used to compare URLs, so it works on the raw string instead of
+    decoding and re-encoding every part like urllib.parse would.
+    """
+    scheme, sep, rest = url.partition('://')
+    if not sep:
+        return url
+    scheme = scheme.lower()
+    rest, _, query = rest.partition('#')[0].partition('?')
+    netloc, _, path = rest.partition('/')
+    userinfo, at, host = netloc.rpartition('@')
+    host = host.lower()
+    port_suffix = DEFAULT_PORT_SUFFIXES.get(scheme)
+    if port_suffix and host.endswith(port_suffix):
+        host = host[:-len(port_suffix)]
+
+    if query:
+        params = [param for param in query.split('&') if param and param.partition('=')[0] not in ignore_params]
+        params.sort()
+        query = '&'.join(params)
+    return f"{scheme}://{userinfo}{at}{host}/{path}{'?' if query else ''}{query}"
+
+
+def normalize_name(name):
+    """Compare channel names without case, spaces or punctuation."""
+    return NAME_KEY_PATTERN.sub('', name.casefold())
+
+
+def channel_keys(extinf, url_key, keys):
+    """Return the (key, value) pairs a split channel is indexed under, skipping empty values."""
+    pairs = []
+    if 'url' in keys:
+        pairs.append(('url', url_key))
+    if 'tvg-id' in keys:
+        match = TVG_ID_PATTERN.search(extinf)
+        tvg_id = match.group(1).strip().casefold() if match else ''
+        if tvg_id:
+            pairs.append(('tvg-id', tvg_id))
+    if 'name' in keys:
+        name = normalize_name(split_extinf(extinf)[1] or '')
+        if name:
+            pairs.append(('name', name))
+    return pairs
+
+
+def dedupe_providers(providers, keys=DEFAULT_DEDUPE_KEYS, prefer=(), ignore_params=()):
+    """Drop channels that share a key with a channel kept before them, return (providers, report).
+
+    Providers listed in prefer are visited first, in that order, then the
+    rest in export order; within a provider the first copy wins. Every key
+    has its own hash index, so each channel costs one lookup per key.
+    Providers left without channels are dropped.
+    """
+    ignore_params = frozenset(ignore_params)
+    order = [provider for provider in dict.fromkeys(prefer) if provider in providers]
+    order.extend(provider for provider in providers if provider not in order)
+
+    # key -> {value: (provider, extinf, url) of the kept channel}
+    indexes = {key: {} for key in keys}
+    kept = {}
+    duplicates = []
+    by_key = dict.fromkeys(keys, 0)
+    streams_before = set()
+    streams_after = set()
+    total = 0
+
+    for provider in order:
+        channels = []
+        for extinf, url in providers[provider]:
+            total += 1
+            url_key = normalize_url(url, ignore_params)
+            streams_before.add(url_key)
+            pairs = channel_keys(extinf, url_key, keys)
+
+            match = next(((key, value) for key, value in pairs if value in indexes[key]), None)
+            if match is not None:
+                key, value = match
+                kept_provider, kept_extinf, kept_url = indexes[key][value]
+                by_key[key] += 1
+                duplicates.append({
+                    'provider': provider,
+                    'name': split_extinf(extinf)[1],
+                    'url': url,
+                    'key': key,
+                    'value': value,
+                    'kept': {'provider': kept_provider, 'name': split_extinf(kept_extinf)[1], 'url': kept_url},
+                })
+                continue
+
+            for key, value in pairs:
+                indexes[key][value] = (provider, extinf, url)
+            streams_after.add(url_key)
+            channels.append((extinf, url))
+        if channels:
+            kept[provider] = channels
+
+    # Keep the export's provider order, the file name collision rule depends on it
+    deduped = {provider: kept[provider] for provider in providers if provider in kept}
+    report = {
+        'channels': total,
+        'kept': total - len(duplicates),
+        'collapsed': len(duplicates),
+        'by_key': by_key,
+        'streams_before': len(streams_before),
+        'streams_after': len(streams_after),
+        'duplicates': duplicates,
+    }
+    return deduped, report
+
+
+def print_report(report, limit=20):
+    by_key = ', '.join(f"{key} {count}" for key, count in report['by_key'].items())
+    print(f"\nDedupe: collapsed {report['collapsed']}/{report['channels']} channels ({by_key}), "
+          f"upstream streams {report['streams_before']} -> {report['streams_after']}")
+    for row in report['duplicates'][:limit]:
+        kept = row['kept']
+        print(f"  [{row['provider']}] {row['name']} -> [{kept['provider']}] {kept['name']} (same {row['key']})")
+
+
+def parse_dedupe_keys(value):
+    keys = tuple(key.strip() for key in value.split(',') if key.strip())
+    unknown = [key for key in keys if key not in DEDUPE_KEYS]
+    if unknown or not keys:
+        raise argparse.ArgumentTypeError(f"expected a comma separated list of {', '.join(DEDUPE_KEYS)}")
+    return keys
+
+
+def add_dedupe_arguments(parser):
+    """Add the channel dedupe options to an argparse parser."""
+    parser.add_argument('--dedupe', action='store_true',
+                        help="Collapse channels that share a stream URL or tvg-id across providers and groups")
+    parser.add_argument('--dedupe-keys', type=parse_dedupe_keys, default=DEFAULT_DEDUPE_KEYS,
+                        help=f"Comma separated keys that make two channels the same, "
+                             f"from {', '.join(DEDUPE_KEYS)} (default: {','.join(DEFAULT_DEDUPE_KEYS)})")
+    parser.add_argument('--dedupe-prefer', action='append', default=[], metavar='PROVIDER',
+                        help="Keep this provider's copy over the others, repeat for a ranked list "
+                             "(default: the provider that comes first in the export)")
+    parser.add_argument('--dedupe-ignore-param', action='append', default=[], metavar='NAME',
+                        help="Query parameter to ignore when comparing URLs, e.g. a per-session token")
+    parser.add_argument('--dedupe-report', help="Write the collapsed channels to this JSON file")
+
+
+def run_dedupe_stage(args, providers):
+    """Run the options of add_dedupe_arguments() against parsed providers, return the deduped providers."""
+    providers, report = dedupe_providers(providers, args.dedupe_keys, args.dedupe_prefer, args.dedupe_ignore_param)
+    print_report(report)
+    if args.dedupe_report:
+        with atomic_open(args.dedupe_report) as f:
+            f.write(json.dumps(report, ensure_ascii=False, indent=4).encode('utf-8'))
+    return providers
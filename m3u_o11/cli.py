@@ -0,0 +1,38 @@
+import argparse
+import importlib
+import sys
+
+# command -> (module, summary). A command's module is only imported when that
+# command runs, so e.g. `split` never loads requests and --help loads nothing.
+COMMANDS = {
+    'split': ('o11_m3u_split_by_group', "Split an o11 export into one playlist per provider"),
+    'convert': ('m3u_to_provider_channels', "Convert an M3U playlist into a provider cfg"),
+    'convert-mytvsuper': ('m3u_to_provider_channels_mytvsuper', "Convert a MyTV Super M3U playlist into a provider cfg"),
+    'batch': ('batch_convert', "Convert many playlists listed in a jobs file concurrently"),
+    'index': ('m3u_index', "Build or query the SQLite index of an o11 export"),
+    'daemon': ('o11_daemon', "Keep split playlists and cfgs up to date from a config file"),
+    'serve': ('o11_server', "Run the daemon and serve its outputs over HTTP"),
+}
+
+
+def main(argv=None):
+    """Run one of COMMANDS with the remaining arguments."""
+    argv = sys.argv[1:] if argv is None else argv
+    parser = argparse.ArgumentParser(
+        prog="m3u-o11",
+        usage="%(prog)s [-h] command [args ...]",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="commands:\n" + "\n".join(f"  {name:<19}{summary}" for name, (_, summary) in COMMANDS.items())
+               + "\n\nRun 'm3u-o11 <command> --help' for the options of a command.",
+    )
+    parser.add_argument('command', choices=COMMANDS, metavar='command')
+    # Only the command name is parsed here, everything after it belongs to the command
+    args = parser.parse_args(argv[:1])
+
+    module = importlib.import_module(f".{COMMANDS[args.command][0]}", __package__)
+    return module.main(argv[1:])
+
+
+def run(command):
+    """Entry point of the standalone scripts kept for backward compatibility."""
+    return main([command, *sys.argv[1:]])
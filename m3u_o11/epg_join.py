@@ -0,0 +1,395 @@
+import difflib
+import gzip
+import io
+import json
+import os
+import re
+import sys
+import time
+from collections import Counter
+
+from .atomic_io import atomic_open
+from .m3u_fetch import DEFAULT_TIMEOUT
+from .m3u_parser import parse_extinf_attrs, set_extinf_attr, split_extinf
+
+
+GZIP_MAGIC = b'\x1f\x8b'
+
+# Quality and format suffixes that guides and playlists disagree on
+NAME_SUFFIX_PATTERN = re.compile(r'(?:uhd|fhd|hd|sd|4k|8k|hevc|h265)+$')
+NAME_NOISE_PATTERN = re.compile(r'[\W_]+')
+DIGITS_PATTERN = re.compile(r'\d+')
+
+FUZZY_CUTOFF = 0.85
+
+
+def open_guide(source, timeout=DEFAULT_TIMEOUT):
+    """Open an XMLTV file or URL as a binary stream, gunzipping it when needed."""
+    if source.startswith(('http://', 'https://')):
+        import requests
+
+        response = requests.get(source, stream=True, timeout=timeout)
+        response.raise_for_status()
+        response.raw.decode_content = True
+        # Otherwise urllib3 marks the stream closed at EOF, before the buffer is drained
+        response.raw.auto_close = False
+        raw = io.BufferedReader(response.raw, buffer_size=1024 * 1024)
+    else:
+        raw = open(source, 'rb', buffering=1024 * 1024)
+
+    if raw.peek(2)[:2] == GZIP_MAGIC:
+        return gzip.GzipFile(fileobj=raw)
+    return raw
+
+
+def iter_guide_elements(source, timeout=DEFAULT_TIMEOUT):
+    """Yield ('tv', attrs) once, then every <channel> and <programme> element of a guide.
+
+    Each element is cleared from the tree after it is yielded, so memory
+    stays flat however large the guide is. Consumers must not keep
+    references to yielded elements.
+    """
+    import xml.etree.ElementTree as ET
+
+    with open_guide(source, timeout) as f:
+        root = None
+        for event, elem in ET.iterparse(f, events=('start', 'end')):
+            if event == 'start':
+                if root is None:
+                    root = elem
+                    yield 'tv', dict(elem.attrib)
+                continue
+            if elem.tag in ('channel', 'programme'):
+                yield elem.tag, elem
+                root.clear()
+
+
+def normalize_name(name):
+    """Lowercase a channel name and drop punctuation and quality suffixes for matching."""
+    name = NAME_NOISE_PATTERN.sub('', name.lower())
+    return NAME_SUFFIX_PATTERN.sub('', name) or name
+
+
+class GuideIndex:
+    """Channel ids, display names and programme counts of one XMLTV guide."""
+
+    def __init__(self):
+        self.tv_attrs = {}
+        self.names = {}
+        self.programmes = Counter()
+        self._by_name = None
+
+    @classmethod
+    def scan(cls, source, timeout=DEFAULT_TIMEOUT):
+        """Build the index in one streaming pass over source."""
+        return scan_guide(source, timeout=timeout)[0]
+
+    def add(self, tag, elem):
+        """Index one <channel> or <programme> element."""
+        if tag == 'channel':
+            channel_id = elem.get('id')
+            if channel_id:
+                self.names[channel_id] = [node.text.strip() for node in elem.iter('display-name') if node.text]
+        else:
+            self.programmes[elem.get('channel')] += 1
+
+    def by_name(self):
+        """Map normalized display names (and ids) to channel ids."""
+        if self._by_name is None:
+            by_name = {}
+            for channel_id, names in self.names.items():
+                for name in [channel_id, *names]:
+                    by_name.setdefault(normalize_name(name), channel_id)
+            self._by_name = by_name
+        return self._by_name
+
+    def match(self, tvg_id, name, fuzzy=False):
+        """Return the guide id for a playlist channel, or None.
+
+        Ids match exactly, then case-insensitively by name; with fuzzy the
+        closest normalized display name above FUZZY_CUTOFF with the same
+        numbers is accepted.
+        """
+        if tvg_id in self.names:
+            return tvg_id
+
+        by_name = self.by_name()
+        for candidate in (tvg_id, name):
+            if candidate and normalize_name(candidate) in by_name:
+                return by_name[normalize_name(candidate)]
+
+        if fuzzy and name:
+            normalized = normalize_name(name)
+            # 'CCTV1' and 'CCTV13' are close but different channels: numbers must agree
+            digits = DIGITS_PATTERN.findall(normalized)
+            for close in difflib.get_close_matches(normalized, by_name.keys(), n=5, cutoff=FUZZY_CUTOFF):
+                if DIGITS_PATTERN.findall(close) == digits:
+                    return by_name[close]
+        return None
+
+
+def join_providers(providers, guide, fuzzy=False, rewrite=False):
+    """Join split playlist channels against a GuideIndex and return a report.
+
+    providers is the parse_m3u_by_provider() mapping. Channels whose
+    tvg-id is not a guide id are looked up by name; with rewrite their
+    #EXTINF lines get the matched id, in place. Only the guide's channels
+    are needed, check_programmes() fills in 'no_programmes' once the
+    programmes are counted.
+    """
+    report = {'channels': 0, 'matched': 0, 'rewritten': [], 'missing': [], 'no_programmes': [], 'used_ids': []}
+    used_ids = {}
+    matched = []
+
+    for provider, channels in providers.items():
+        for position, (extinf_line, url) in enumerate(channels):
+            attrs = parse_extinf_attrs(extinf_line)
+            tvg_id = attrs.get('tvg-id', "")
+            name = split_extinf(extinf_line)[1] or attrs.get('tvg-name', "")
+            report['channels'] += 1
+
+            guide_id = guide.match(tvg_id, name, fuzzy=fuzzy)
+            if guide_id is None:
+                report['missing'].append({'provider': provider, 'tvg_id': tvg_id, 'name': name})
+                continue
+
+            report['matched'] += 1
+            used_ids[guide_id] = None
+            if guide_id != tvg_id:
+                # Without rewrite the report lists the tvg-ids that would change
+                new_line = set_extinf_attr(extinf_line, 'tvg-id', guide_id) if rewrite else None
+                if new_line != extinf_line:
+                    report['rewritten'].append({'provider': provider, 'name': name, 'from': tvg_id, 'to': guide_id})
+                if rewrite:
+                    channels[position] = (new_line, url)
+            matched.append({'provider': provider, 'tvg_id': guide_id, 'name': name})
+
+    report['used_ids'] = list(used_ids)
+    report['_matched'] = matched
+    return report
+
+
+def check_programmes(report, guide):
+    """List the matched channels without a single programme in the guide."""
+    report['no_programmes'] = [row for row in report.pop('_matched') if not guide.programmes[row['tvg_id']]]
+    return report
+
+
+def parse_xmltv_time(value):
+    """Convert an XMLTV time such as '20261017083000 +0800' to a Unix timestamp."""
+    import calendar
+
+    stamp = calendar.timegm((int(value[0:4]), int(value[4:6]), int(value[6:8]),
+                             int(value[8:10]), int(value[10:12]), int(value[12:14] or 0)))
+    offset = value[14:].strip()
+    if offset:
+        sign = -1 if offset[0] == '-' else 1
+        stamp -= sign * (int(offset[1:3]) * 3600 + int(offset[3:5]) * 60)
+    return stamp
+
+
+def programme_in_window(elem, start=None, stop=None):
+    """Whether a <programme> overlaps the start/stop window; programmes without usable times are kept."""
+    try:
+        end = elem.get('stop') or elem.get('start')
+        if start is not None and end and parse_xmltv_time(end) <= start:
+            return False
+        if stop is not None and elem.get('start') and parse_xmltv_time(elem.get('start')) >= stop:
+            return False
+    except ValueError:
+        pass
+    return True
+
+
+def serialize_element(elem):
+    import xml.etree.ElementTree as ET
+
+    elem.tail = None
+    return b'  ' + ET.tostring(elem, encoding='utf-8', xml_declaration=False) + b'\n'
+
+
+class GuideWriter:
+    """Write an XMLTV guide element by element, gzipped when the path ends in .gz."""
+
+    def __init__(self, path, tv_attrs):
+        from xml.sax.saxutils import quoteattr
+
+        self._context = atomic_open(path, buffering=1024 * 1024)
+        f = self._context.__enter__()
+        self.f = gzip.GzipFile(fileobj=f, mode='wb', compresslevel=6, mtime=0) if path.endswith('.gz') else f
+        attrs = ''.join(f" {key}={quoteattr(value)}" for key, value in tv_attrs.items())
+        self.f.write(f'<?xml version="1.0" encoding="UTF-8"?>\n<tv{attrs}>\n'.encode('utf-8'))
+
+    def write(self, data):
+        """Write one element already passed through serialize_element()."""
+        self.f.write(data)
+
+    def close(self, exc_info=(None, None, None)):
+        try:
+            if exc_info[0] is None:
+                self.f.write(b'</tv>\n')
+            if isinstance(self.f, gzip.GzipFile):
+                self.f.close()
+        finally:
+            self._context.__exit__(*exc_info)
+
+
+def scan_guide(source, plan=None, start=None, stop=None, timeout=DEFAULT_TIMEOUT):
+    """Index a guide and write trimmed copies of it in one streaming pass.
+
+    XMLTV lists every <channel> before the first <programme>, so once the
+    channels are read plan(index) is called and returns {output path:
+    channel ids to keep}; the channel elements read so far and everything
+    after them are routed to those outputs. With start and/or stop (Unix
+    timestamps) only programmes overlapping that window are written. Each
+    element is serialized once however many outputs share its channel.
+    Returns the GuideIndex, with every programme counted, and
+    {path: programme count}.
+    """
+    index = GuideIndex()
+    # Channels read before plan() decided where they go
+    pending = []
+    routes = None
+    writers = {}
+    counts = {}
+
+    def route(outputs):
+        routes = {}
+        for path, channel_ids in outputs.items():
+            counts[path] = 0
+            writers[path] = GuideWriter(path, index.tv_attrs)
+            for channel_id in channel_ids:
+                routes.setdefault(channel_id, []).append(path)
+        for channel_id, data in pending:
+            for path in routes.get(channel_id, ()):
+                writers[path].write(data)
+        pending.clear()
+        return routes
+
+    try:
+        for tag, elem in iter_guide_elements(source, timeout):
+            if tag == 'tv':
+                index.tv_attrs = elem
+                continue
+            index.add(tag, elem)
+
+            if tag == 'channel':
+                if routes is None:
+                    if plan is not None:
+                        pending.append((elem.get('id'), serialize_element(elem)))
+                    continue
+                paths = routes.get(elem.get('id'))
+            else:
+                if routes is None:
+                    routes = route(plan(index) if plan is not None else {})
+                paths = routes.get(elem.get('channel'))
+                if not paths or not programme_in_window(elem, start, stop):
+                    continue
+                for path in paths:
+                    counts[path] += 1
+
+            if paths:
+                data = serialize_element(elem)
+                for path in paths:
+                    writers[path].write(data)
+        if routes is None:
+            route(plan(index) if plan is not None else {})
+    except BaseException:
+        exc_info = sys.exc_info()
+        for writer in writers.values():
+            writer.close(exc_info)
+        raise
+    for writer in writers.values():
+        writer.close()
+    return index, counts
+
+
+def write_guides(source, outputs, start=None, stop=None, timeout=DEFAULT_TIMEOUT):
+    """Route one streaming pass over source into several trimmed guides, return {path: programme count}.
+
+    outputs maps each output path to the channel ids it keeps, see scan_guide().
+    """
+    return scan_guide(source, lambda index: outputs, start, stop, timeout)[1]
+
+
+def guide_window(past_hours=None, future_hours=None, now=None):
+    """Return the (start, stop) timestamps of a window around now, None for an open end."""
+    now = time.time() if now is None else now
+    start = now - past_hours * 3600 if past_hours is not None else None
+    stop = now + future_hours * 3600 if future_hours is not None else None
+    return start, stop
+
+
+def write_trimmed_guide(source, channel_ids, output_path, start=None, stop=None, timeout=DEFAULT_TIMEOUT):
+    """Stream source into output_path keeping only the given channel ids, return the programme count."""
+    return write_guides(source, {output_path: set(channel_ids)}, start, stop, timeout)[output_path]
+
+
+def print_report(report, limit=20):
+    print(f"\nEPG: {report['matched']}/{report['channels']} channels found in the guide")
+    for title, key in (("Missing from guide", 'missing'), ("No programmes", 'no_programmes')):
+        if report[key]:
+            print(f"{title}: {len(report[key])}")
+            for row in report[key][:limit]:
+                print(f"  [{row['provider']}] {row['name']} ({row['tvg_id']})")
+    if report['rewritten']:
+        print(f"tvg-id matched by name: {len(report['rewritten'])}")
+        for row in report['rewritten'][:limit]:
+            print(f"  [{row['provider']}] {row['name']}: {row['from']!r} -> {row['to']!r}")
+
+
+def add_epg_arguments(parser):
+    """Add the EPG join options to an argparse parser."""
+    parser.add_argument('--epg', help="XMLTV guide (file or URL, optionally gzipped) to check tvg-ids against")
+    parser.add_argument('--epg-report', help="Write the EPG join report to this JSON file")
+    parser.add_argument('--epg-fuzzy', action='store_true',
+                        help="Match unknown tvg-ids to guide channels by fuzzy display name")
+    parser.add_argument('--epg-rewrite', action='store_true',
+                        help="Rewrite tvg-ids matched by name to the guide's channel id")
+    parser.add_argument('--epg-trim', help="Write a guide with only the matched channels to this file (.gz to compress)")
+    parser.add_argument('--epg-split', action='store_true',
+                        help="Write a trimmed <provider>.xml.gz guide next to each split playlist and point its header at it")
+    parser.add_argument('--epg-base-url',
+                        help="URL the output directory is served from, used in the --epg-split playlist headers")
+    parser.add_argument('--epg-past-hours', type=float,
+                        help="Keep programmes that ended at most this many hours ago (default: all)")
+    parser.add_argument('--epg-future-hours', type=float,
+                        help="Keep programmes starting within this many hours (default: all)")
+
+
+def run_epg_stage(args, providers, guide_outputs=None):
+    """Run the EPG options of add_epg_arguments() against parsed providers in one pass over the guide.
+
+    guide_outputs, when given, is called with the joined providers and
+    returns more {path: channel ids} guides to write in the same pass.
+    Returns the report and the programme count of every written guide.
+    """
+    import xml.etree.ElementTree as ET
+    import requests
+
+    report = None
+
+    def plan(guide):
+        nonlocal report
+        report = join_providers(providers, guide, fuzzy=args.epg_fuzzy, rewrite=args.epg_rewrite)
+        outputs = guide_outputs(providers) if guide_outputs is not None else {}
+        if args.epg_trim:
+            os.makedirs(os.path.dirname(args.epg_trim) or '.', exist_ok=True)
+            outputs[args.epg_trim] = report['used_ids']
+        return outputs
+
+    start, stop = guide_window(args.epg_past_hours, args.epg_future_hours)
+    try:
+        guide, counts = scan_guide(args.epg, plan, start, stop)
+    except (OSError, requests.RequestException, ET.ParseError) as e:
+        print(f"Error reading EPG: {e}")
+        sys.exit(1)
+
+    check_programmes(report, guide)
+    print_report(report)
+    if args.epg_report:
+        with atomic_open(args.epg_report) as f:
+            f.write(json.dumps(report, ensure_ascii=False, indent=4).encode('utf-8'))
+    if args.epg_trim:
+        print(f"Trimmed guide: {len(report['used_ids'])} channels, {counts[args.epg_trim]} programmes -> {args.epg_trim}")
+    return report, counts
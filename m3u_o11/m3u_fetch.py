@@ -0,0 +1,234 @@
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+from .m3u_parser import iter_m3u_lines, iter_m3u_file, iter_chunk_lines
+
+
+DEFAULT_TIMEOUT = 30
+DEFAULT_CACHE_MAX_BYTES = 256 * 1024 * 1024
+CHUNK_SIZE = 65536
+
+
+class FetchCache:
+    """On-disk cache of downloaded playlists keyed by URL.
+
+    Each entry is a body file plus a small JSON file holding its ETag,
+    Last-Modified and timestamps. Entries younger than ``ttl`` seconds are
+    reused without a request, older ones are revalidated with
+    If-None-Match/If-Modified-Since. When the bodies exceed ``max_bytes``
+    the least recently used entries are evicted.
+    """
+
+    def __init__(self, cache_dir, ttl=0, max_bytes=DEFAULT_CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _paths(self, url):
+        import hashlib
+
+        key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        base = os.path.join(self.cache_dir, key)
+        return base + '.body', base + '.json'
+
+    def _load_meta(self, meta_path):
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _save_meta(self, meta_path, meta):
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, meta_path)
+
+    def fetch(self, url, session=None, timeout=DEFAULT_TIMEOUT, evict=True):
+        """Return (body_path, changed) for url, downloading only when needed.
+
+        Callers that read several bodies at once pass evict=False and call
+        evict() once they are done, so no body is removed while in use.
+        """
+        body_path, meta_path = self._paths(url)
+        meta = self._load_meta(meta_path)
+        if meta is not None and not os.path.exists(body_path):
+            meta = None
+
+        now = time.time()
+        if meta is not None and self.ttl and now - meta['fetched_at'] < self.ttl:
+            meta['used_at'] = now
+            self._save_meta(meta_path, meta)
+            return body_path, False
+
+        headers = {}
+        if meta is not None:
+            if meta.get('etag'):
+                headers['If-None-Match'] = meta['etag']
+            if meta.get('last_modified'):
+                headers['If-Modified-Since'] = meta['last_modified']
+
+        import requests
+
+        response = (session or requests).get(url, headers=headers, stream=True, timeout=timeout)
+        with response:
+            if response.status_code == 304 and meta is not None:
+                meta['fetched_at'] = meta['used_at'] = now
+                self._save_meta(meta_path, meta)
+                return body_path, False
+
+            response.raise_for_status()
+
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                        f.write(chunk)
+                os.replace(tmp_path, body_path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+
+        self._save_meta(meta_path, {
+            'url': url,
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'size': os.path.getsize(body_path),
+            'fetched_at': now,
+            'used_at': now,
+        })
+        if evict:
+            self.evict(keep=body_path)
+        return body_path, True
+
+    def evict(self, keep=None):
+        """Remove least recently used entries until the cache fits max_bytes."""
+        with self._lock:
+            entries = []
+            total = 0
+            for name in os.listdir(self.cache_dir):
+                if not name.endswith('.json'):
+                    continue
+                meta_path = os.path.join(self.cache_dir, name)
+                body_path = meta_path[:-len('.json')] + '.body'
+                meta = self._load_meta(meta_path)
+                if meta is None or not os.path.exists(body_path):
+                    continue
+                total += meta['size']
+                entries.append((meta['used_at'], meta['size'], body_path, meta_path))
+
+            entries.sort()
+            for _, size, body_path, meta_path in entries:
+                if total <= self.max_bytes:
+                    break
+                if body_path == keep:
+                    continue
+                for path in (body_path, meta_path):
+                    try:
+                        os.unlink(path)
+                    except FileNotFoundError:
+                        pass
+                total -= size
+
+
+def create_session(pool_size):
+    """Create a requests session whose connection pool fits all workers."""
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def iter_response_chunks(response):
+    """Yield the body of a streamed response, exiting like download_m3u() when the transfer fails."""
+    import requests
+
+    with response:
+        try:
+            yield from response.iter_content(chunk_size=CHUNK_SIZE)
+        except requests.RequestException as e:
+            print(f"Error downloading M3U file: {e}")
+            sys.exit(1)
+
+
+def download_m3u(url, cache=None, session=None, timeout=DEFAULT_TIMEOUT, stats=None):
+    """Stream M3U lines from URL, through the fetch cache when given.
+
+    With a PipelineStats, network time and bytes go to its 'fetch' stage
+    (with the response latency in its counters) and decoding to 'decode'.
+    """
+    # Imported here rather than at module level: requests alone takes longer
+    # to import than converting a local playlist does
+    import requests
+
+    try:
+        if cache is not None:
+            start = time.perf_counter()
+            body_path, changed = cache.fetch(url, session=session, timeout=timeout)
+            if stats is not None:
+                stats.record('fetch', time.perf_counter() - start, items=1, nbytes=os.path.getsize(body_path))
+                stats.count('fetch_not_modified', int(not changed))
+                return stats.timed_iter(iter_m3u_file(body_path), 'decode', measure=len)
+            return iter_m3u_file(body_path)
+
+        start = time.perf_counter()
+        response = (session or requests).get(url, stream=True, timeout=timeout)
+        response.raise_for_status()
+    except requests.RequestException as e:
+        print(f"Error downloading M3U file: {e}")
+        sys.exit(1)
+
+    # The body is read after this returns, so errors and closing are handled as it streams
+    chunks = iter_response_chunks(response)
+    if stats is None:
+        return iter_m3u_lines(iter_chunk_lines(chunks))
+
+    latency = time.perf_counter() - start
+    stats.record('fetch', latency)
+    stats.count('fetch_latency_ms', round(latency * 1000, 1))
+    chunks = stats.timed_iter(chunks, 'fetch', measure=len)
+    return stats.timed_iter(iter_m3u_lines(iter_chunk_lines(chunks)), 'decode', measure=len)
+
+
+def open_m3u_source(source, cache=None, session=None, timeout=DEFAULT_TIMEOUT, stats=None):
+    """Return M3U lines from a URL, a local file or stdin ("-")."""
+    if source == '-':
+        lines = iter_m3u_lines(sys.stdin.buffer)
+    elif os.path.isfile(source):
+        lines = iter_m3u_file(source)
+    else:
+        return download_m3u(source, cache=cache, session=session, timeout=timeout, stats=stats)
+
+    if stats is not None:
+        # Reading a local file or stdin counts as decoding
+        lines = stats.timed_iter(lines, 'decode', measure=len)
+    return lines
+
+
+def add_fetch_arguments(parser):
+    """Add the shared download/cache options to an argparse parser."""
+    parser.add_argument('--timeout', type=float, default=DEFAULT_TIMEOUT,
+                        help=f"HTTP timeout in seconds (default: {DEFAULT_TIMEOUT})")
+    parser.add_argument('--cache-dir',
+                        help="Cache downloaded playlists here and revalidate them with ETag/Last-Modified")
+    parser.add_argument('--cache-ttl', type=float, default=0,
+                        help="Reuse a cached playlist without any request for this many seconds")
+    parser.add_argument('--cache-max-mb', type=float, default=DEFAULT_CACHE_MAX_BYTES / (1024 * 1024),
+                        help="Evict least recently used cache entries above this size")
+
+
+def fetch_cache_from_args(args):
+    """Build a FetchCache from parsed arguments, or None when caching is off."""
+    if not args.cache_dir:
+        return None
+    return FetchCache(args.cache_dir, ttl=args.cache_ttl, max_bytes=int(args.cache_max_mb * 1024 * 1024))
@@ -0,0 +1,264 @@
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import time
+
+from .atomic_io import make_temp, replace_with_temp
+from .m3u_parser import parse_extinf_attrs, split_extinf, iter_m3u_file
+from .o11_m3u_split_by_group import extract_channel_info
+
+
+SCHEMA = """
+CREATE TABLE source (
+    path TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    sha256 TEXT NOT NULL,
+    indexed_at REAL NOT NULL
+);
+CREATE TABLE channels (
+    seq INTEGER PRIMARY KEY,
+    provider TEXT NOT NULL,
+    grp TEXT NOT NULL,
+    name TEXT NOT NULL,
+    tvg_id TEXT NOT NULL,
+    logo TEXT NOT NULL,
+    url TEXT NOT NULL,
+    extinf TEXT NOT NULL,
+    split_extinf TEXT NOT NULL,
+    manifest_type TEXT NOT NULL,
+    license_type TEXT NOT NULL,
+    license_key TEXT NOT NULL,
+    props TEXT NOT NULL,  -- directive lines between #EXTINF and URL, newline separated
+    split INTEGER NOT NULL
+);
+"""
+
+# Created after the bulk insert, which is much faster than maintaining them row by row
+INDEXES = """
+CREATE INDEX channels_provider ON channels (provider, grp);
+CREATE INDEX channels_grp ON channels (grp);
+CREATE INDEX channels_tvg_id ON channels (tvg_id);
+"""
+
+# Columns returned by query_channels, in order
+CHANNEL_COLUMNS = ('provider', 'grp', 'name', 'tvg_id', 'logo', 'url',
+                   'manifest_type', 'license_type', 'license_key')
+
+KODIPROP_FIELDS = {
+    'inputstream.adaptive.manifest_type=': 'manifest_type',
+    'inputstream.adaptive.license_type=': 'license_type',
+    'inputstream.adaptive.license_key=': 'license_key',
+}
+
+
+def file_sha256(filepath):
+    """Hash a file in chunks."""
+    digest = hashlib.sha256()
+    with open(filepath, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def iter_index_records(lines):
+    """Yield one record tuple per channel, including its #KODIPROP fields.
+
+    A channel is an #EXTINF line, optional '#' directive lines and its URL.
+    ``split`` is set for the channels o11_m3u_split_by_group keeps, which
+    are only those whose URL directly follows the #EXTINF line.
+    """
+    entry = None
+    # Whether the splitter would read the current line as a URL
+    expect_url = False
+
+    for line in lines:
+        line = line.strip()
+        consumed_as_url = expect_url
+        expect_url = not consumed_as_url and line.startswith('#EXTINF:')
+
+        if line.startswith('#EXTINF:'):
+            entry = {'extinf': line, 'props': [], 'split': not consumed_as_url}
+            continue
+        if entry is None:
+            continue
+        if line.startswith('#'):
+            entry['props'].append(line)
+            entry['split'] = False
+            continue
+        if not line:
+            entry = None
+            continue
+
+        provider, split_extinf_line, _ = extract_channel_info(entry['extinf'], line)
+        attrs = parse_extinf_attrs(split_extinf_line)
+        kodiprops = {'manifest_type': "", 'license_type': "", 'license_key': ""}
+        for prop in entry['props']:
+            for marker, field in KODIPROP_FIELDS.items():
+                if prop.startswith('#KODIPROP:') and marker in prop:
+                    kodiprops[field] = prop.split('=')[1].strip()
+
+        yield (
+            provider,
+            attrs.get('group-title', ""),
+            split_extinf(split_extinf_line)[1] or "",
+            attrs.get('tvg-id', ""),
+            attrs.get('tvg-logo', ""),
+            line,
+            entry['extinf'],
+            split_extinf_line,
+            kodiprops['manifest_type'],
+            kodiprops['license_type'],
+            kodiprops['license_key'],
+            '\n'.join(entry['props']),
+            int(entry['split']),
+        )
+        entry = None
+
+
+def build_index(db_path, source_path):
+    """Parse source_path once and store its channels in a fresh SQLite index."""
+    stat = os.stat(source_path)
+    # A unique temp file, so concurrent rebuilds of the same index don't share one
+    fd, tmp_path = make_temp(db_path)
+    os.close(fd)
+    try:
+        conn = sqlite3.connect(tmp_path)
+        try:
+            conn.executescript("PRAGMA journal_mode = OFF; PRAGMA synchronous = OFF;" + SCHEMA)
+            with conn:
+                conn.executemany(
+                    "INSERT INTO channels (provider, grp, name, tvg_id, logo, url, extinf, split_extinf, "
+                    "manifest_type, license_type, license_key, props, split) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    iter_index_records(iter_m3u_file(source_path)),
+                )
+                conn.execute(
+                    "INSERT INTO source VALUES (?, ?, ?, ?, ?)",
+                    (os.path.abspath(source_path), stat.st_size, stat.st_mtime_ns,
+                     file_sha256(source_path), time.time()),
+                )
+            conn.executescript(INDEXES)
+        finally:
+            conn.close()
+        replace_with_temp(tmp_path, db_path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def index_is_current(conn, source_path):
+    """Check the stored size/mtime, falling back to the hash when only mtime moved."""
+    row = conn.execute("SELECT path, size, mtime_ns, sha256 FROM source").fetchone()
+    if row is None:
+        return False
+
+    path, size, mtime_ns, sha256 = row
+    stat = os.stat(source_path)
+    if path != os.path.abspath(source_path) or size != stat.st_size:
+        return False
+    if mtime_ns == stat.st_mtime_ns:
+        return True
+
+    # Touched but possibly unchanged: compare content before re-parsing
+    if file_sha256(source_path) != sha256:
+        return False
+    with conn:
+        conn.execute("UPDATE source SET mtime_ns = ?", (stat.st_mtime_ns,))
+    return True
+
+
+def open_index(db_path, source_path=None):
+    """Open an index, (re)building it first when source_path is given and has changed."""
+    if source_path is not None:
+        current = False
+        if os.path.exists(db_path):
+            conn = sqlite3.connect(db_path)
+            try:
+                current = index_is_current(conn, source_path)
+            except sqlite3.DatabaseError:
+                current = False
+            if current:
+                return conn
+            conn.close()
+        build_index(db_path, source_path)
+    elif not os.path.exists(db_path):
+        raise FileNotFoundError(db_path)
+    return sqlite3.connect(db_path)
+
+
+def load_providers(conn):
+    """Return the channels by provider exactly as parse_m3u_by_provider would."""
+    providers = {}
+    for provider, split_extinf_line, url in conn.execute(
+        "SELECT provider, split_extinf, url FROM channels WHERE split = 1 ORDER BY seq"
+    ):
+        if provider not in providers:
+            providers[provider] = []
+
+        providers[provider].append((split_extinf_line, url))
+    return providers
+
+
+def query_channels(conn, provider=None, group=None, tvg_id=None):
+    """Return channel rows matching all of the given filters, in playlist order."""
+    conditions = []
+    params = []
+    for column, value in (('provider', provider), ('grp', group), ('tvg_id', tvg_id)):
+        if value is not None:
+            conditions.append(f"{column} = ?")
+            params.append(value)
+
+    sql = f"SELECT {', '.join(CHANNEL_COLUMNS)} FROM channels"
+    if conditions:
+        sql += " WHERE " + " AND ".join(conditions)
+    sql += " ORDER BY seq"
+    return [dict(zip(CHANNEL_COLUMNS, row)) for row in conn.execute(sql, params)]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="m3u-o11 index")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    build_parser = subparsers.add_parser('build', help="Parse an M3U file into an index")
+    build_parser.add_argument('input_file')
+    build_parser.add_argument('index_file')
+
+    query_parser = subparsers.add_parser('query', help="List channels by provider/group/tvg-id")
+    query_parser.add_argument('index_file')
+    query_parser.add_argument('--source', help="Rebuild the index first if this M3U file changed")
+    query_parser.add_argument('--provider')
+    query_parser.add_argument('--group')
+    query_parser.add_argument('--tvg-id')
+    query_parser.add_argument('--json', action='store_true', help="Print rows as JSON lines")
+
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    if args.command == 'build':
+        build_index(args.index_file, args.input_file)
+        conn = sqlite3.connect(args.index_file)
+        count = conn.execute("SELECT COUNT(*) FROM channels").fetchone()[0]
+        conn.close()
+        print(f"Indexed {count} channels into {args.index_file} in {time.perf_counter() - start:.3f}s")
+        return
+
+    try:
+        conn = open_index(args.index_file, args.source)
+    except FileNotFoundError:
+        print(f"Index not found: {args.index_file}")
+        sys.exit(1)
+
+    with conn:
+        rows = query_channels(conn, args.provider, args.group, args.tvg_id)
+    conn.close()
+
+    for row in rows:
+        if args.json:
+            print(json.dumps(row, ensure_ascii=False))
+        else:
+            print(f"{row['provider']}\t{row['grp']}\t{row['name']}\t{row['tvg_id']}\t{row['url']}")
+    print(f"{len(rows)} channels in {(time.perf_counter() - start) * 1000:.1f}ms", file=sys.stderr)
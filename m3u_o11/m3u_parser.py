@@ -0,0 +1,84 @@
+import re
+
+
+# 一次扫描 EXTINF 行内的全部 key="value" 属性
+ATTR_PATTERN = re.compile(r'(?<![\w-])([\w-]+)="([^"]*)"')
+
+# 频道名中需要去掉的字符: 空格 , . ! - ( )
+NAME_STRIP_PATTERN = re.compile('[{}]'.format(re.escape(' ,.!-()')))
+
+GROUP_TITLE_PATTERN = re.compile(r'group-title="[^"]*"')
+
+# EXTINF 行开头的 #EXTINF:<时长>
+EXTINF_TAG_PATTERN = re.compile(r'\s*\S*')
+
+
+def parse_extinf_attrs(line):
+    """Scan an EXTINF line once and return all of its attributes."""
+    # Reversed so the first occurrence wins, same as a plain re.search would
+    return dict(ATTR_PATTERN.findall(line)[::-1])
+
+
+def split_extinf(line):
+    """Split an EXTINF line into its tag part and the display title."""
+    head, sep, title = line.partition(',')
+    if not sep:
+        return line, None
+    return head, title.strip()
+
+
+def set_extinf_attr(line, name, value):
+    """Set one attribute of an EXTINF line, adding it right after the duration when missing."""
+    head = split_extinf(line)[0]
+    rest = line[len(head):]
+    attr = f'{name}="{value}"'
+    match = re.search(rf'(?<![\w-]){re.escape(name)}="[^"]*"', head)
+    if match:
+        head = head[:match.start()] + attr + head[match.end():]
+    else:
+        end = EXTINF_TAG_PATTERN.match(head).end()
+        head = f"{head[:end]} {attr}{head[end:]}"
+    return head + rest
+
+
+def clean_channel_name(name):
+    """Remove separator characters from a tvg-name."""
+    return NAME_STRIP_PATTERN.sub('', name)
+
+
+def rewrite_extinf_head(head, group, provider=None):
+    """Replace group-title and drop the provider prefix from tvg-id."""
+    if provider is not None:
+        head = head.replace(f'tvg-id="{provider}/', 'tvg-id="')
+    replacement = f'group-title="{group}"'
+    return GROUP_TITLE_PATTERN.sub(lambda _: replacement, head)
+
+
+def iter_m3u_lines(source):
+    """Yield text lines from a file handle, response.iter_lines() or any iterable of lines."""
+    for line in source:
+        if isinstance(line, bytes):
+            try:
+                line = line.decode('utf-8')
+            except UnicodeDecodeError:
+                line = line.decode('latin-1')
+        yield line.rstrip('\r\n')
+
+
+def iter_chunk_lines(chunks):
+    """Split a stream of byte chunks into lines, e.g. response.iter_content()."""
+    # response.iter_lines() yields a spurious empty line whenever a chunk ends
+    # exactly on a newline, which would be read as an empty URL
+    pending = b''
+    for chunk in chunks:
+        lines = (pending + chunk).split(b'\n')
+        pending = lines.pop()
+        yield from lines
+    if pending:
+        yield pending
+
+
+def iter_m3u_file(filepath):
+    """Yield text lines from a local M3U file without reading it whole."""
+    with open(filepath, 'rb') as f:
+        yield from iter_m3u_lines(f)
@@ -0,0 +1,100 @@
+import argparse
+
+from .cfg_sharding import add_shard_arguments, sharder_from_args
+from .m3u_fetch import DEFAULT_TIMEOUT, open_m3u_source, add_fetch_arguments, fetch_cache_from_args
+from .m3u_parser import parse_extinf_attrs, clean_channel_name
+# Not used here: the builders used to live in this module, kept importable from it
+from .o11_templates import create_channel_object, create_provider_object  # noqa: F401
+from .pipeline_stats import add_stats_arguments, instrument
+from .stream_probe import add_probe_arguments, prober_from_args
+
+
+def iter_m3u(lines):
+    """Yield channel information from M3U lines as they are read."""
+    if isinstance(lines, str):
+        lines = lines.strip().split('\n')
+    lines = iter(lines)
+
+    for line in lines:
+        line = line.strip()
+
+        # Skip header or empty lines
+        if line.startswith("#EXTM3U") or not line:
+            continue
+
+        # Look for EXTINF line
+        if line.startswith('#EXTINF:'):
+            attrs = parse_extinf_attrs(line)
+
+            # Get URL from next line
+            url = next(lines, None)
+            if url is not None:
+                yield {
+                    'id': attrs.get('tvg-id', ""),
+                    'name': clean_channel_name(attrs['tvg-name']) if 'tvg-name' in attrs else "",
+                    'logo': attrs.get('tvg-logo', ""),
+                    'url': url.strip(),
+                    'group': attrs.get('group-title', "Ungrouped"),
+                }
+
+
+def parse_m3u(content):
+    """Parse M3U content and extract channel information."""
+    return list(iter_m3u(content))
+
+
+def convert_m3u_lines(lines, provider_name, output_file=None, incremental=False, report_file=None,
+                      compact=False, probe=None, sharder=None, stats=None):
+    """Convert M3U lines to provider channels JSON format and return the channel count."""
+    # split_pipeline imports this module for its FLAVORS entry
+    from .split_pipeline import convert_m3u_lines as convert_flavor_lines
+
+    return convert_flavor_lines(lines, provider_name, 'generic', output_file, incremental, report_file, compact,
+                                probe, sharder=sharder, stats=stats)
+
+
+def m3u_to_provider_channels(m3u_url, provider_name, output_file=None, cache=None, timeout=DEFAULT_TIMEOUT,
+                              incremental=False, report_file=None, compact=False, probe=None, sharder=None, stats=None):
+    """Convert M3U to provider channels JSON format."""
+    lines = open_m3u_source(m3u_url, cache=cache, timeout=timeout, stats=stats)
+    return convert_m3u_lines(lines, provider_name, output_file, incremental, report_file, compact, probe,
+                             sharder=sharder, stats=stats)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="m3u-o11 convert")
+    parser.add_argument('m3u_url', help="M3U URL, local file or '-' for stdin")
+    parser.add_argument('provider_name')
+    parser.add_argument('output_file', nargs='?')
+    parser.add_argument('--incremental', action='store_true',
+                        help="Patch only added/removed/changed channels into an existing output_file")
+    parser.add_argument('--patch-report', help="Write the incremental patch report to this JSON file")
+    parser.add_argument('--compact', action='store_true',
+                        help="Write compact JSON without indentation, using orjson/msgspec when installed")
+    add_fetch_arguments(parser)
+    add_probe_arguments(parser)
+    add_shard_arguments(parser)
+    add_stats_arguments(parser)
+    args = parser.parse_args(argv)
+    if args.incremental and not args.output_file:
+        parser.error("--incremental requires output_file")
+    if args.shards is not None:
+        if args.shards < 1 or not args.output_file or args.incremental:
+            parser.error("--shards needs a positive count and output_file, and cannot be combined with --incremental")
+        if args.shard_max_streams and len(args.shard_max_streams) not in (1, args.shards):
+            parser.error("--shard-max-streams takes one limit or one per shard")
+
+    with instrument(args, 'm3u_to_provider_channels') as stats:
+        m3u_to_provider_channels(
+            args.m3u_url,
+            args.provider_name,
+            args.output_file,
+            cache=fetch_cache_from_args(args),
+            timeout=args.timeout,
+            incremental=args.incremental,
+            report_file=args.patch_report,
+            compact=args.compact,
+            probe=prober_from_args(args),
+            sharder=sharder_from_args(args),
+            stats=stats,
+        )
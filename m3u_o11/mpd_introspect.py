@@ -0,0 +1,319 @@
+import json
+import os
+import sys
+import threading
+import time
+
+from .atomic_io import atomic_write
+from .m3u_fetch import create_session
+
+
+DEFAULT_MPD_WORKERS = 16
+DEFAULT_MPD_TIMEOUT = 10.0
+
+CENC_NAMESPACE = '{urn:mpeg:cenc:2013}'
+
+DRM_SYSTEMS = {
+    'urn:uuid:edef8ba9-79d6-4ace-a3c8-27dcd51d21ed': 'widevine',
+    'urn:uuid:9a04f079-9840-4286-ab92-e65be0885f95': 'playready',
+    'urn:uuid:94ce86fb-07ff-4f43-adb8-93d2fa968ca2': 'fairplay',
+}
+
+# Attributes a Representation inherits from its AdaptationSet
+INHERITED_ATTRIBUTES = ('mimeType', 'contentType', 'codecs', 'lang', 'frameRate', 'audioSamplingRate',
+                        'width', 'height')
+
+
+def local_name(tag):
+    return tag.rpartition('}')[2]
+
+
+def parse_duration(value):
+    """Parse an ISO 8601 duration such as 'PT2H59M52.5S' into seconds."""
+    if not value or not value.startswith('P'):
+        return None
+    seconds = 0.0
+    number = ''
+    in_time = False
+    units = {'D': 86400, 'H': 3600, 'M': 60, 'S': 1}
+    for char in value[1:]:
+        if char == 'T':
+            in_time = True
+        elif char.isdigit() or char == '.':
+            number += char
+        elif char in units and number:
+            # 'M' before 'T' is months, treat them as 30 days
+            seconds += float(number) * (units[char] if in_time or char != 'M' else 30 * 86400)
+            number = ''
+    return seconds
+
+
+def format_duration(seconds):
+    seconds = int(seconds)
+    hours, rest = divmod(seconds, 3600)
+    minutes, seconds = divmod(rest, 60)
+    return f"{hours}h{minutes:02d}m{seconds:02d}s" if hours else f"{minutes}m{seconds:02d}s"
+
+
+def parse_frame_rate(value):
+    if not value:
+        return None
+    numerator, _, denominator = value.partition('/')
+    rate = float(numerator) / float(denominator or 1)
+    return int(rate) if rate == int(rate) else round(rate, 2)
+
+
+def _track_kind(attrs):
+    content_type = attrs.get('contentType') or attrs.get('mimeType', '').partition('/')[0]
+    if content_type == 'text' or attrs.get('codecs', '').startswith(('stpp', 'wvtt')):
+        return 'subtitles'
+    if content_type in ('video', 'audio'):
+        return content_type
+    return None
+
+
+def parse_mpd(source):
+    """Stream-parse the first Period of an MPD into its tracks.
+
+    source is a path or a binary file object. Returns a dict with ``live``,
+    ``duration`` (seconds or None), ``drm`` (system names) and ``video``,
+    ``audio`` and ``subtitles`` track lists, each track a dict of its id,
+    bandwidth, codecs and so on, with ``kid`` from cenc:default_KID.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        # iterparse only closes files it opened itself once it runs to the end
+        with open(source, 'rb') as f:
+            return parse_mpd(f)
+
+    import xml.etree.ElementTree as ET
+
+    info = {'live': False, 'duration': None, 'drm': [], 'video': [], 'audio': [], 'subtitles': []}
+    adaptation = None
+    representation = None
+
+    for event, elem in ET.iterparse(source, events=('start', 'end')):
+        tag = local_name(elem.tag)
+        if event == 'start':
+            if tag == 'MPD':
+                info['live'] = elem.get('type') == 'dynamic'
+                info['duration'] = parse_duration(
+                    elem.get('timeShiftBufferDepth') if info['live'] else elem.get('mediaPresentationDuration')
+                )
+            elif tag == 'AdaptationSet':
+                adaptation = {'attrs': dict(elem.attrib), 'kid': '', 'tracks': []}
+            elif tag == 'Representation' and adaptation is not None:
+                attrs = {name: adaptation['attrs'][name] for name in INHERITED_ATTRIBUTES
+                         if name in adaptation['attrs']}
+                attrs.update(elem.attrib)
+                representation = {'attrs': attrs, 'kid': ''}
+            elif tag == 'ContentProtection':
+                scheme = (elem.get('schemeIdUri') or '').lower()
+                if scheme in DRM_SYSTEMS and DRM_SYSTEMS[scheme] not in info['drm']:
+                    info['drm'].append(DRM_SYSTEMS[scheme])
+                kid = elem.get(CENC_NAMESPACE + 'default_KID')
+                if kid:
+                    kid = kid.replace('-', '').lower()
+                    if representation is not None:
+                        representation['kid'] = kid
+                    elif adaptation is not None:
+                        adaptation['kid'] = kid
+            continue
+
+        if tag == 'Representation' and representation is not None:
+            adaptation['tracks'].append(representation)
+            representation = None
+        elif tag == 'AdaptationSet' and adaptation is not None:
+            for track in adaptation['tracks']:
+                attrs = track['attrs']
+                kind = _track_kind(attrs)
+                if kind is None:
+                    continue
+                info[kind].append({
+                    'id': attrs.get('id', ''),
+                    'bandwidth': int(attrs.get('bandwidth', 0)),
+                    'codecs': attrs.get('codecs', ''),
+                    'width': int(attrs.get('width', 0)),
+                    'height': int(attrs.get('height', 0)),
+                    'frame_rate': parse_frame_rate(attrs.get('frameRate')),
+                    'sampling_rate': int(attrs.get('audioSamplingRate', 0)),
+                    'lang': attrs.get('lang', ''),
+                    'kid': track['kid'] or adaptation['kid'],
+                })
+            adaptation = None
+            elem.clear()
+        elif tag == 'Period':
+            # Later periods repeat the same tracks
+            break
+
+    info['video'].sort(key=lambda track: track['bandwidth'], reverse=True)
+    return info
+
+
+def video_label(track):
+    label = f"{track['height']}p" if track['height'] else track['id']
+    if track['frame_rate']:
+        label += str(track['frame_rate'])
+    return label
+
+
+def manifest_channel_fields(info):
+    """Return the o11 channel fields (tracks, default audio, ManifestInfo) described by a parse_mpd() result."""
+    video_list = []
+    for track in info['video']:
+        desc = f"{video_label(track)} ({track['codecs']}, {track['bandwidth'] // 1024}Kb/s)"
+        video_list.append({"Id": track['id'], "Desc": desc, "Kid": track['kid']})
+
+    audio_list = []
+    for track in info['audio']:
+        details = [track['codecs']]
+        if track['sampling_rate']:
+            details.append(f"{track['sampling_rate'] // 1000}Khz")
+        details.append(f"{track['bandwidth'] // 1024}Kb/s")
+        desc = f"{track['lang'] or track['id'].partition('_')[0]} ({', '.join(details)})"
+        audio_list.append({"Id": track['id'], "Desc": desc, "Kid": track['kid']})
+
+    subtitles_list = [
+        {"Id": track['id'], "Desc": track['lang'] or track['id'], "Kid": ""}
+        for track in info['subtitles']
+    ]
+
+    manifest_info = f"Format: <i><b>dash ({'live' if info['live'] else 'vod'})</b></i><br>"
+    if info['video']:
+        manifest_info += f"Best video: <i><b>{video_label(info['video'][0])}</b></i><br>"
+    if info['duration']:
+        manifest_info += f"Duration: <i><b>{format_duration(info['duration'])}</b></i><br>"
+    if info['drm']:
+        manifest_info += f"\nDRM: <i><b>{''.join(name + ' ' for name in info['drm'])}</b></i><br>"
+
+    return {
+        "ManifestInfo": manifest_info,
+        "Audio": audio_list[0]["Id"] if audio_list else "",
+        "VideoList": video_list or None,
+        "AudioList": audio_list or None,
+        "SubtitlesList": subtitles_list or None,
+    }
+
+
+class MpdIntrospector:
+    """Fetch and parse DASH manifests concurrently, caching results by URL and validator.
+
+    URLs are revalidated with If-None-Match/If-Modified-Since and only
+    re-parsed when the server returns a new body; local paths are
+    re-parsed only when their size or mtime changed. With ``cache_file``
+    the parsed results survive between runs.
+    """
+
+    def __init__(self, workers=DEFAULT_MPD_WORKERS, timeout=DEFAULT_MPD_TIMEOUT, cache_file=None, session=None):
+        self.workers = workers
+        self.timeout = timeout
+        self.cache_file = cache_file
+        self.session = session
+        self.lock = threading.Lock()
+        self.entries = self._load_cache()
+        self.parsed = 0
+
+    def _load_cache(self):
+        if not self.cache_file or not os.path.exists(self.cache_file):
+            return {}
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_cache(self):
+        if self.cache_file:
+            with self.lock:
+                data = json.dumps(self.entries, separators=(',', ':')).encode('utf-8')
+            atomic_write(self.cache_file, data)
+
+    def _store(self, source, entry):
+        with self.lock:
+            self.entries[source] = entry
+            self.parsed += 1
+        return entry['info']
+
+    def _inspect_file(self, path):
+        stat = os.stat(path)
+        validator = f"{stat.st_size}-{stat.st_mtime_ns}"
+        cached = self.entries.get(path)
+        if cached is not None and cached.get('validator') == validator:
+            return cached['info']
+        return self._store(path, {'validator': validator, 'info': parse_mpd(path)})
+
+    def _inspect_url(self, session, url):
+        cached = self.entries.get(url)
+        headers = {}
+        if cached is not None:
+            if cached.get('etag'):
+                headers['If-None-Match'] = cached['etag']
+            if cached.get('last_modified'):
+                headers['If-Modified-Since'] = cached['last_modified']
+
+        with session.get(url, headers=headers, timeout=self.timeout, stream=True) as response:
+            if response.status_code == 304 and cached is not None:
+                return cached['info']
+            response.raise_for_status()
+            # Parse straight from the socket, the body is never held in full
+            response.raw.decode_content = True
+            info = parse_mpd(response.raw)
+
+        return self._store(url, {
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'info': info,
+        })
+
+    def _inspect_one(self, session, source):
+        import xml.etree.ElementTree as ET
+        import requests
+
+        try:
+            if source.startswith(('http://', 'https://')):
+                return self._inspect_url(session, source)
+            return self._inspect_file(source)
+        except (requests.RequestException, OSError, ET.ParseError, ValueError) as e:
+            print(f"Failed to inspect {source}: {e}", file=sys.stderr)
+            return None
+
+    def inspect(self, sources):
+        """Return {source: parse_mpd() result or None on failure} for MPD URLs or paths."""
+        from concurrent.futures import ThreadPoolExecutor
+
+        start = time.perf_counter()
+        sources = list(dict.fromkeys(sources))
+        self.parsed = 0
+        results = {}
+        if sources:
+            session = self.session or create_session(self.workers)
+            try:
+                with ThreadPoolExecutor(max_workers=min(self.workers, len(sources))) as executor:
+                    for source, info in zip(sources, executor.map(lambda s: self._inspect_one(session, s), sources)):
+                        results[source] = info
+            finally:
+                if self.session is None:
+                    session.close()
+            self._save_cache()
+
+        failed = sum(1 for info in results.values() if info is None)
+        print(f"Inspected {len(sources)} manifests ({self.parsed} parsed, {len(sources) - self.parsed - failed} cached, "
+              f"{failed} failed) in {time.perf_counter() - start:.2f}s", file=sys.stderr, flush=True)
+        return results
+
+
+def add_mpd_arguments(parser):
+    """Add the manifest introspection options to an argparse parser."""
+    parser.add_argument('--mpd-introspect', action='store_true',
+                        help="Fetch each DASH manifest and fill in its real video/audio/subtitle tracks")
+    parser.add_argument('--mpd-workers', type=int, default=DEFAULT_MPD_WORKERS,
+                        help=f"Concurrent manifest fetches (default: {DEFAULT_MPD_WORKERS})")
+    parser.add_argument('--mpd-timeout', type=float, default=DEFAULT_MPD_TIMEOUT,
+                        help=f"Manifest fetch timeout in seconds (default: {DEFAULT_MPD_TIMEOUT})")
+    parser.add_argument('--mpd-cache', help="Keep parsed manifests in this JSON file, keyed by URL and ETag")
+
+
+def introspector_from_args(args):
+    """Build an MpdIntrospector from parsed arguments, or None when introspection is off."""
+    if not args.mpd_introspect:
+        return None
+    return MpdIntrospector(workers=args.mpd_workers, timeout=args.mpd_timeout, cache_file=args.mpd_cache)
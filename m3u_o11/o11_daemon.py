@@ -0,0 +1,357 @@
+import argparse
+import ctypes
+import ctypes.util
+import json
+import os
+import random
+import select
+import signal
+import struct
+import sys
+import time
+
+from .atomic_io import atomic_write
+from .cfg_serializer import dumps
+from .m3u_fetch import DEFAULT_TIMEOUT, FetchCache
+from .m3u_parser import iter_m3u_file
+from .o11_m3u_split_by_group import (
+    SPLIT_HEADER,
+    parse_m3u_by_provider,
+    render_provider_m3u,
+    sanitize_filename,
+)
+from .split_pipeline import FLAVORS
+
+
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+INOTIFY_EVENT = struct.Struct('iIII')
+
+# Longest the run loop blocks, so a stop request is noticed quickly
+WAKEUP_INTERVAL = 1.0
+
+
+class PollingWatcher:
+    """Detect changed files by comparing their size and mtime."""
+
+    def __init__(self, paths, interval=2.0):
+        self.interval = interval
+        self.state = {path: self._stat(path) for path in paths}
+
+    @staticmethod
+    def _stat(path):
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return stat.st_size, stat.st_mtime_ns
+
+    def wait(self, timeout):
+        """Wait up to timeout seconds and return the set of changed paths."""
+        deadline = time.monotonic() + timeout
+        while True:
+            changed = set()
+            for path, old in self.state.items():
+                new = self._stat(path)
+                if new != old:
+                    self.state[path] = new
+                    changed.add(path)
+            remaining = deadline - time.monotonic()
+            if changed or remaining <= 0:
+                return changed
+            time.sleep(min(self.interval, remaining))
+
+    def close(self):
+        pass
+
+
+class InotifyWatcher:
+    """Detect changed files with Linux inotify on their parent directories.
+
+    Watching the directories also catches files replaced by rename, which
+    is how o11 exports and our own atomic writes land.
+    """
+
+    def __init__(self, paths):
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+        self.paths = {os.path.abspath(path): path for path in paths}
+        self.directories = {}
+        for directory in {os.path.dirname(path) for path in self.paths}:
+            wd = libc.inotify_add_watch(self.fd, directory.encode(), IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE)
+            if wd < 0:
+                os.close(self.fd)
+                raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {directory}")
+            self.directories[wd] = directory
+
+    def wait(self, timeout):
+        """Wait up to timeout seconds and return the set of changed paths."""
+        readable, _, _ = select.select([self.fd], [], [], max(timeout, 0))
+        changed = set()
+        if not readable:
+            return changed
+
+        # Let writers that produce several events finish before reading them all
+        time.sleep(0.2)
+        while True:
+            try:
+                data = os.read(self.fd, 65536)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset < len(data):
+                wd, _, _, name_length = INOTIFY_EVENT.unpack_from(data, offset)
+                offset += INOTIFY_EVENT.size
+                name = data[offset:offset + name_length].rstrip(b'\0').decode('utf-8', 'surrogateescape')
+                offset += name_length
+                path = os.path.join(self.directories.get(wd, ''), name)
+                if path in self.paths:
+                    changed.add(self.paths[path])
+        return changed
+
+    def close(self):
+        os.close(self.fd)
+
+
+def create_watcher(paths, poll_interval=2.0):
+    """Use inotify when available, otherwise fall back to polling."""
+    if sys.platform.startswith('linux'):
+        try:
+            return InotifyWatcher(paths)
+        except (OSError, AttributeError) as e:
+            print(f"inotify unavailable ({e}), polling every {poll_interval}s")
+    return PollingWatcher(paths, poll_interval)
+
+
+class Daemon:
+    """Keep split playlists and provider cfgs up to date from one warm process.
+
+    ``config`` holds ``split`` jobs (local o11 exports split into
+    ``output_dir``) and ``convert`` jobs (playlist URLs converted into a
+    provider cfg), see load_config(). Listeners registered with
+    add_listener() are called as ``listener(kind, name, data)`` for every
+    regenerated output, with data None for a removed one.
+    """
+
+    def __init__(self, config):
+        import requests
+
+        self.config = config
+        self.cache = FetchCache(config['cache_dir'], max_bytes=config['cache_max_bytes'])
+        self.session = requests.Session()
+        self.listeners = []
+        self.running = True
+
+        # Warm state: parsed split providers and last rendered outputs
+        self.split_state = {}
+        self.outputs = {}
+        self.stats = {'started_at': time.time(), 'runs': 0, 'jobs': {}}
+        self.stats_json = b'{}'
+
+        now = time.monotonic()
+        self.next_poll = {job['output']: now for job in config['convert']}
+
+    def add_listener(self, listener):
+        self.listeners.append(listener)
+
+    def _emit(self, kind, name, path, data):
+        """Write an output only when its bytes changed and notify listeners."""
+        if self.outputs.get(path) == data and os.path.exists(path):
+            return False
+        atomic_write(path, data)
+        self.outputs[path] = data
+        for listener in self.listeners:
+            listener(kind, name, data)
+        return True
+
+    def _remove(self, kind, name, path):
+        """Delete an output that is no longer generated and notify listeners."""
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        self.outputs.pop(path, None)
+        for listener in self.listeners:
+            listener(kind, name, None)
+
+    def _record(self, job_name, start, **fields):
+        self.stats['jobs'][job_name] = {
+            'finished_at': time.time(),
+            'duration': round(time.perf_counter() - start, 4),
+            **fields,
+        }
+
+    def run_split(self, job):
+        """Re-split one o11 export, rewriting only providers whose channels changed."""
+        start = time.perf_counter()
+        input_file = job['input']
+        output_dir = job['output_dir']
+        try:
+            _, providers = parse_m3u_by_provider(iter_m3u_file(input_file))
+        except OSError as e:
+            self._record(input_file, start, error=str(e))
+            return
+
+        os.makedirs(output_dir, exist_ok=True)
+        previous = self.split_state.get(input_file, {})
+        outputs = {}
+        for provider, channels in providers.items():
+            outputs[sanitize_filename(provider)] = (provider, channels)
+
+        written = 0
+        for safe_name, (provider, channels) in outputs.items():
+            path = os.path.join(output_dir, f"{safe_name}.m3u")
+            if previous.get(provider) == channels and path in self.outputs:
+                continue
+            if self._emit('m3u', safe_name, path, render_provider_m3u(job.get('header', SPLIT_HEADER), channels)):
+                written += 1
+
+        # Providers gone from the export since the last run
+        removed = {sanitize_filename(provider) for provider in previous} - outputs.keys()
+        for safe_name in removed:
+            self._remove('m3u', safe_name, os.path.join(output_dir, f"{safe_name}.m3u"))
+
+        self.split_state[input_file] = providers
+        self._record(
+            input_file, start,
+            providers=len(providers),
+            channels=sum(len(channels) for channels in providers.values()),
+            written=written,
+            removed=len(removed),
+        )
+        print(f"Split {input_file}: {written}/{len(outputs)} provider files updated, {len(removed)} removed")
+
+    def run_convert(self, job):
+        """Fetch one playlist and regenerate its cfg when the upstream changed."""
+        import requests
+
+        start = time.perf_counter()
+        output = job['output']
+        name = job['provider']
+        try:
+            body_path, changed = self.cache.fetch(job['url'], session=self.session, timeout=self.config['timeout'])
+            if not changed and output in self.outputs:
+                self._record(output, start, changed=False)
+                return
+
+            parse, build_channel, build_provider = FLAVORS[job.get('flavor', 'generic')]
+            channels = [build_channel(channel) for channel in parse(iter_m3u_file(body_path))]
+            data = dumps(build_provider(name, channels), compact=job.get('compact', False))
+            # Served under the output file name, jobs may share a provider name
+            written = self._emit('cfg', os.path.splitext(os.path.basename(output))[0], output, data)
+        except (requests.RequestException, OSError, ValueError) as e:
+            self._record(output, start, error=str(e))
+            print(f"Convert {output} failed: {e}")
+            return
+
+        self._record(output, start, changed=True, channels=len(channels), written=written)
+        print(f"Convert {output}: {len(channels)} channels{'' if written else ', unchanged'}")
+
+    def schedule_next_poll(self, job):
+        interval = job.get('interval', self.config['poll_interval'])
+        jitter = self.config['jitter']
+        self.next_poll[job['output']] = time.monotonic() + interval + random.uniform(-jitter, jitter)
+
+    def write_stats(self):
+        self.stats['runs'] += 1
+        self.stats['updated_at'] = time.time()
+        # Serialized snapshot, safe to hand to other threads
+        self.stats_json = json.dumps(self.stats, indent=4).encode('utf-8')
+        if self.config.get('stats_file'):
+            atomic_write(self.config['stats_file'], self.stats_json)
+
+    def run_once(self):
+        """Run every job once."""
+        for job in self.config['split']:
+            self.run_split(job)
+        for job in self.config['convert']:
+            self.run_convert(job)
+            self.schedule_next_poll(job)
+        self.write_stats()
+
+    def run(self):
+        """Run until stopped, reacting to input changes and polling upstreams."""
+        split_jobs = {job['input']: job for job in self.config['split']}
+        watcher = create_watcher(list(split_jobs), self.config['watch_poll_interval'])
+        try:
+            self.run_once()
+            while self.running:
+                now = time.monotonic()
+                timeout = min((deadline - now for deadline in self.next_poll.values()), default=WAKEUP_INTERVAL)
+                changed = watcher.wait(max(0.0, min(timeout, WAKEUP_INTERVAL)))
+
+                ran = False
+                for path in changed:
+                    self.run_split(split_jobs[path])
+                    ran = True
+
+                now = time.monotonic()
+                for job in self.config['convert']:
+                    if self.next_poll[job['output']] <= now:
+                        self.run_convert(job)
+                        self.schedule_next_poll(job)
+                        ran = True
+
+                if ran:
+                    self.write_stats()
+        finally:
+            watcher.close()
+
+    def stop(self, *_):
+        self.running = False
+
+
+def load_config(filepath):
+    """Load the daemon config and fill in defaults.
+
+    Example::
+
+        {
+            "poll_interval": 300,
+            "jitter": 30,
+            "stats_file": "output/daemon-stats.json",
+            "split": [{"input": "full.m3u", "output_dir": "output"}],
+            "convert": [
+                {"url": "http://xxx/hami.m3u", "provider": "hami", "output": "output/hami.cfg"},
+                {"url": "http://xxx/mytvsuper.m3u", "provider": "mytvsuper",
+                 "output": "output/mytvsuper.cfg", "flavor": "mytvsuper", "interval": 600}
+            ]
+        }
+    """
+    with open(filepath, 'r', encoding='utf-8') as f:
+        config = json.load(f)
+
+    config.setdefault('split', [])
+    config.setdefault('convert', [])
+    config.setdefault('poll_interval', 300)
+    config.setdefault('jitter', 30)
+    config.setdefault('watch_poll_interval', 2.0)
+    config.setdefault('timeout', DEFAULT_TIMEOUT)
+    config.setdefault('cache_dir', '.cache')
+    config.setdefault('cache_max_bytes', 256 * 1024 * 1024)
+
+    for job in config['convert']:
+        if job.get('flavor', 'generic') not in FLAVORS:
+            print(f"Unknown flavor '{job['flavor']}' for {job['output']}, expected one of: {', '.join(FLAVORS)}")
+            sys.exit(1)
+    return config
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="m3u-o11 daemon")
+    parser.add_argument('config_file', help="JSON file with split and convert jobs")
+    parser.add_argument('--once', action='store_true', help="Run every job once and exit")
+    args = parser.parse_args(argv)
+
+    daemon = Daemon(load_config(args.config_file))
+    if args.once:
+        daemon.run_once()
+        return
+
+    signal.signal(signal.SIGTERM, daemon.stop)
+    signal.signal(signal.SIGINT, daemon.stop)
+    daemon.run()
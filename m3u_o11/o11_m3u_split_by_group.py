@@ -0,0 +1,527 @@
+import argparse
+import contextlib
+import itertools
+import mmap
+import sys
+import os
+import re
+import time
+from functools import partial
+from urllib.parse import quote
+
+from .atomic_io import atomic_open
+from .channel_dedupe import add_dedupe_arguments, run_dedupe_stage
+from .epg_join import add_epg_arguments, run_epg_stage
+from .m3u_parser import parse_extinf_attrs, split_extinf, rewrite_extinf_head, iter_m3u_lines
+from .pipeline_stats import add_stats_arguments, instrument
+
+
+def open_m3u_file(filepath):
+    """Open M3U file and stream its lines."""
+    try:
+        f = open(filepath, 'rb')
+    except Exception as e:
+        print(f"Error reading M3U file: {e}")
+        sys.exit(1)
+
+    with f:
+        yield from iter_m3u_lines(f)
+
+
+PROVIDER_PREFIX_PATTERN = re.compile(r'^\[.*?\]\s*')
+
+EPG_URL = "https://assets.livednow.com/epg.xml"
+
+# Header written at the top of every split playlist
+SPLIT_HEADER = f'#EXTM3U\n#EXTM3U x-tvg-url="{EPG_URL}"\n'
+
+# Spill files kept open at once by --memory-budget
+DEFAULT_MAX_OPEN_FILES = 64
+
+
+def extract_channel_info(extinf_line, url):
+    """Extract provider and reformat channel info."""
+    # Extract provider
+    provider = parse_extinf_attrs(extinf_line).get('provider', "unknown")
+
+    # Extract channel name
+    head, full_name = split_extinf(extinf_line)
+    if full_name is not None:
+        # Remove provider prefix (e.g., "[hami] ")
+        clean_name = PROVIDER_PREFIX_PATTERN.sub('', full_name)
+
+        # Extract new group and channel name
+        if ' - ' in clean_name:
+            new_group, channel_name = clean_name.split(' - ', 1)
+            new_group = new_group.strip()
+            channel_name = channel_name.strip()
+        else:
+            new_group = "Ungrouped"
+            channel_name = clean_name
+
+        # Update group-title and remove provider prefix from tvg-id attribute
+        new_extinf = rewrite_extinf_head(
+            head, new_group, provider if provider != "unknown" else None
+        )
+        new_extinf += f',{channel_name}'
+    else:
+        new_extinf = extinf_line
+        provider = "unknown"
+
+    return provider, new_extinf, url
+
+
+def iter_channels_by_provider(lines):
+    """Yield (provider, extinf, url) for each channel as M3U lines are read."""
+    lines = iter(lines)
+
+    for line in lines:
+        line = line.strip()
+
+        if not line.startswith('#EXTINF:'):
+            continue
+
+        url = next(lines, None)
+        if url is None:
+            break
+
+        url = url.strip()
+        if not url or url.startswith('#'):
+            continue
+
+        yield extract_channel_info(line, url)
+
+
+def parse_m3u_by_provider(lines):
+    """Parse M3U lines and organize channels by provider."""
+    if isinstance(lines, str):
+        lines = lines.strip().split('\n')
+    lines = iter(lines)
+    providers = {}
+
+    header = None
+    first_line = next(lines, None)
+    if first_line is not None:
+        if first_line.strip().startswith('#EXTM3U'):
+            header = first_line.strip()
+        else:
+            lines = itertools.chain([first_line], lines)
+
+    for provider, new_extinf, url in iter_channels_by_provider(lines):
+        if provider not in providers:
+            providers[provider] = []
+
+        providers[provider].append((new_extinf, url))
+
+    return header, providers
+
+
+def find_chunk_boundaries(buf, count):
+    """Split buf into up to count byte ranges that each start on an #EXTINF line.
+
+    A range never starts on an #EXTINF line that directly follows another
+    one, because the serial parser would consume it as that line's URL.
+    """
+    size = len(buf)
+    boundaries = [0]
+    for k in range(1, count):
+        pos = max(size * k // count, boundaries[-1])
+        while True:
+            pos = buf.find(b'\n#EXTINF:', pos)
+            if pos == -1:
+                break
+            previous_line = buf[buf.rfind(b'\n', 0, pos) + 1:pos]
+            if not previous_line.strip().startswith(b'#EXTINF:'):
+                break
+            pos += 1
+        if pos == -1:
+            break
+        if pos + 1 > boundaries[-1]:
+            boundaries.append(pos + 1)
+    boundaries.append(size)
+    return list(zip(boundaries, boundaries[1:]))
+
+
+def iter_mmap_lines(buf, start, end):
+    """Yield raw lines of buf between two byte offsets."""
+    buf.seek(start)
+    while buf.tell() < end:
+        yield buf.readline()
+
+
+def parse_chunk_by_provider(filepath, start, end):
+    """Parse one byte range of an M3U file into per-provider channel lists."""
+    providers = {}
+    with open(filepath, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+        lines = iter_m3u_lines(iter_mmap_lines(buf, start, end))
+        for provider, new_extinf, url in iter_channels_by_provider(lines):
+            if provider not in providers:
+                providers[provider] = []
+
+            providers[provider].append((new_extinf, url))
+    return providers
+
+
+def parse_m3u_file_parallel(filepath, workers):
+    """Parse an M3U file across worker processes, same result as parse_m3u_by_provider."""
+    from concurrent.futures import ProcessPoolExecutor
+
+    with open(filepath, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return None, {}
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            first_line = next(iter_m3u_lines([buf.readline()])).strip()
+            ranges = find_chunk_boundaries(buf, workers)
+
+    header = first_line if first_line.startswith('#EXTM3U') else None
+
+    providers = {}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(parse_chunk_by_provider, filepath, start, end) for start, end in ranges]
+        # Merge in file order so providers and channels keep their serial order
+        for future in futures:
+            for provider, channels in future.result().items():
+                if provider not in providers:
+                    providers[provider] = channels
+                else:
+                    providers[provider].extend(channels)
+
+    return header, providers
+
+
+def sanitize_filename(name):
+    """Convert a string to a valid filename."""
+    sanitized = re.sub(r'[\\/*?:"<>|]', '_', name)
+    sanitized = sanitized.strip('. ')
+    if not sanitized:
+        sanitized = "unknown"
+    return sanitized
+
+
+def render_provider_m3u(header, channels):
+    """Render one provider playlist as UTF-8 bytes with a single join."""
+    lines = [header if header else "#EXTM3U"]
+    lines.extend(itertools.chain.from_iterable(channels))
+    lines.append("")
+    return '\n'.join(lines).encode('utf-8')
+
+
+def write_provider_m3u_file(output_path, header, channels):
+    """Render and atomically write one provider playlist."""
+    with atomic_open(output_path) as f:
+        f.write(render_provider_m3u(header, channels))
+
+
+def write_provider_m3u_files(header, providers, output_dir='.', workers=8, headers=None):
+    """Write separate M3U files for each provider in parallel.
+
+    headers optionally maps sanitized provider names to their own header.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    os.makedirs(output_dir, exist_ok=True)
+
+    # Providers whose names sanitize to the same file: the last one wins
+    outputs = {}
+    for provider, channels in providers.items():
+        safe_provider_name = sanitize_filename(provider)
+        outputs[safe_provider_name] = channels
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            safe_provider_name: executor.submit(
+                write_provider_m3u_file,
+                os.path.join(output_dir, f"{safe_provider_name}.m3u"),
+                headers.get(safe_provider_name, header) if headers else header,
+                channels,
+            )
+            for safe_provider_name, channels in outputs.items()
+        }
+        for future in futures.values():
+            future.result()
+
+    return {safe_provider_name: len(channels) for safe_provider_name, channels in outputs.items()}
+
+
+def provider_guide_outputs(providers, output_dir):
+    """Return {<output_dir>/<provider>.xml.gz: tvg-ids} for the split playlists, see scan_guide()."""
+    os.makedirs(output_dir, exist_ok=True)
+
+    # Same last-one-wins rule as write_provider_m3u_files
+    outputs = {}
+    for provider, channels in providers.items():
+        ids = {parse_extinf_attrs(extinf_line).get('tvg-id') for extinf_line, _ in channels}
+        ids.discard(None)
+        ids.discard("")
+        outputs[os.path.join(output_dir, f"{sanitize_filename(provider)}.xml.gz")] = ids
+    return outputs
+
+
+def provider_guide_headers(providers, base_url):
+    """Return the per-provider playlist headers pointing at base_url/<provider>.xml.gz."""
+    headers = {}
+    for provider in providers:
+        safe_name = sanitize_filename(provider)
+        guide_url = f"{base_url.rstrip('/')}/{quote(safe_name)}.xml.gz"
+        headers[safe_name] = f'#EXTM3U\n#EXTM3U x-tvg-url="{guide_url}"\n'
+    return headers
+
+
+WHITESPACE_BYTES = b' \t\r\n\f\v'
+
+
+def decode_line(raw):
+    """Decode one line the same way iter_m3u_lines does."""
+    try:
+        return raw.decode('utf-8')
+    except UnicodeDecodeError:
+        return raw.decode('latin-1')
+
+
+def split_m3u_bytes(filepath, header, output_dir='.'):
+    """Split an o11 export by provider working on the mmapped bytes.
+
+    Only #EXTINF lines are decoded and rewritten; URL lines are written to
+    the provider files straight from the mapped buffer. Returns the number
+    of providers and the channel count per written file, like
+    parse_m3u_by_provider + write_provider_m3u_files.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    header_bytes = (header if header else "#EXTM3U").encode('utf-8') + b'\n'
+
+    files = {}
+    outputs = []
+    counts = {}
+    with contextlib.ExitStack() as stack:
+        f = stack.enter_context(open(filepath, 'rb'))
+        size = os.fstat(f.fileno()).st_size
+        buf = stack.enter_context(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)) if size else b''
+        view = stack.enter_context(memoryview(buf))
+
+        pos = 0
+        while pos < size:
+            end = buf.find(b'\n', pos)
+            if end == -1:
+                end = size
+            line_start, pos = pos, end + 1
+
+            # Only lines that could be #EXTINF need a closer look
+            first = buf[line_start:line_start + 1]
+            if first != b'#' and first not in WHITESPACE_BYTES:
+                continue
+            extinf = buf[line_start:end].strip()
+            if not extinf.startswith(b'#EXTINF:'):
+                continue
+
+            # The next line is the URL, trimmed by offsets without copying
+            if pos >= size:
+                break
+            url_start = pos
+            url_end = buf.find(b'\n', pos)
+            if url_end == -1:
+                url_end = size
+            pos = url_end + 1
+            while url_start < url_end and buf[url_start] in WHITESPACE_BYTES:
+                url_start += 1
+            while url_end > url_start and buf[url_end - 1] in WHITESPACE_BYTES:
+                url_end -= 1
+            if url_start == url_end or buf[url_start] == ord('#'):
+                continue
+
+            provider, new_extinf, _ = extract_channel_info(decode_line(extinf), None)
+
+            out = files.get(provider)
+            if out is None:
+                path = os.path.join(output_dir, f"{sanitize_filename(provider)}.m3u")
+                output = atomic_open(path, buffering=1024 * 1024)
+                out = files[provider] = output.__enter__()
+                # Unlink the temp file if splitting fails
+                stack.push(output)
+                outputs.append(output)
+                out.write(header_bytes)
+                counts[provider] = 0
+            out.write(new_extinf.encode('utf-8') + b'\n')
+            out.write(view[url_start:url_end])
+            out.write(b'\n')
+            counts[provider] += 1
+
+        # Rename into place in creation order so that, like the str path, the
+        # last provider wins when two names sanitize to the same file
+        stack.pop_all()
+        for output in outputs:
+            output.__exit__(None, None, None)
+
+    provider_counts = {}
+    for provider, count in counts.items():
+        provider_counts[sanitize_filename(provider)] = count
+    return len(counts), provider_counts
+
+
+def iter_timed(iterable, timings, key):
+    """Yield from iterable, adding the time spent producing items to timings[key]."""
+    iterator = iter(iterable)
+    while True:
+        start = time.perf_counter()
+        item = next(iterator, None)
+        timings[key] = timings.get(key, 0.0) + time.perf_counter() - start
+        if item is None:
+            return
+        yield item
+
+
+def split_playlist(args):
+    """Split args.input_file into per-provider files, return (provider_total, provider_counts, timings)."""
+    output_dir = args.output_dir
+    timings = {}
+
+    header = f'#EXTM3U\n#EXTM3U x-tvg-url="{args.epg_url}"\n'
+
+    if args.bytes:
+        # Reading, parsing and writing happen in one pass over the mapped file
+        start = time.perf_counter()
+        provider_total, provider_counts = split_m3u_bytes(args.input_file, header, output_dir)
+        timings['split'] = time.perf_counter() - start
+    elif args.memory_budget:
+        from .split_pipeline import SpillPool, split_and_convert
+
+        # Channels go straight to per-provider buffers that spill to disk over budget
+        pool = SpillPool(int(args.memory_budget * 1024 * 1024), args.max_open_files)
+        start = time.perf_counter()
+        provider_total, provider_counts = split_and_convert(
+            iter_timed(open_m3u_file(args.input_file), timings, 'read'), output_dir, header, pool=pool,
+        )
+        timings['split'] = time.perf_counter() - start - timings['read']
+        print(f"Spilled {pool.spilled_bytes / 1024 / 1024:.1f}MB to disk in {pool.spills} writes")
+    elif args.cfg_dir and not args.dedupe:
+        from .split_pipeline import split_and_convert
+
+        # Playlists and cfgs are streamed out while the input is parsed once
+        start = time.perf_counter()
+        provider_total, provider_counts = split_and_convert(
+            iter_timed(open_m3u_file(args.input_file), timings, 'read'), output_dir, header,
+            cfg_dir=args.cfg_dir, flavors=args.cfg_flavors, compact=args.cfg_compact,
+        )
+        timings['split'] = time.perf_counter() - start - timings['read']
+    else:
+        start = time.perf_counter()
+        if args.index:
+            from .m3u_index import open_index, load_providers
+
+            timings['read'] = 0.0
+            with contextlib.closing(open_index(args.index, args.input_file)) as conn:
+                providers = load_providers(conn)
+        elif args.parse_workers > 1:
+            # Workers read through mmap while parsing, reading is not timed apart
+            timings['read'] = 0.0
+            _, providers = parse_m3u_file_parallel(args.input_file, args.parse_workers)
+        else:
+            _, providers = parse_m3u_by_provider(iter_timed(open_m3u_file(args.input_file), timings, 'read'))
+        timings['parse'] = time.perf_counter() - start - timings['read']
+        provider_total = len(providers)
+
+        if args.dedupe:
+            start = time.perf_counter()
+            providers = run_dedupe_stage(args, providers)
+            timings['dedupe'] = time.perf_counter() - start
+
+        headers = None
+        if args.epg:
+            start = time.perf_counter()
+            # The check, --epg-trim and the provider guides share one read of the guide
+            guide_outputs = partial(provider_guide_outputs, output_dir=output_dir) if args.epg_split else None
+            _, counts = run_epg_stage(args, providers, guide_outputs)
+            if args.epg_split:
+                headers = provider_guide_headers(providers, args.epg_base_url)
+                programmes = [counts[os.path.join(output_dir, f"{safe_name}.xml.gz")] for safe_name in headers]
+                print(f"Provider guides: {sum(programmes)} programmes in {len(programmes)} files")
+            timings['epg'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        if args.cfg_dir:
+            from .split_pipeline import write_providers
+
+            records = ((provider, extinf, url) for provider, channels in providers.items() for extinf, url in channels)
+            _, provider_counts = write_providers(records, output_dir, header, cfg_dir=args.cfg_dir,
+                                                 flavors=args.cfg_flavors, compact=args.cfg_compact)
+        else:
+            provider_counts = write_provider_m3u_files(header, providers, output_dir, workers=args.workers,
+                                                       headers=headers)
+        timings['write'] = time.perf_counter() - start
+
+    return provider_total, provider_counts, timings
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="m3u-o11 split")
+    parser.add_argument('input_file', help="M3U file exported from o11")
+    parser.add_argument('--output-dir', default="output", help="Directory for the per-provider files (default: output)")
+    parser.add_argument('--workers', type=int, default=8, help="Parallel file writers (default: 8)")
+    parser.add_argument('--parse-workers', type=int, default=1,
+                        help="Parse the input in this many processes (default: 1, serial)")
+    parser.add_argument('--bytes', action='store_true',
+                        help="Split the mmapped input as bytes, decoding only #EXTINF lines")
+    parser.add_argument('--index',
+                        help="Load channels from this SQLite index, rebuilding it only when the input changed")
+    parser.add_argument('--memory-budget', type=float, metavar='MB',
+                        help="Buffer at most this many MB of channels, spilling the rest to temp files "
+                             "in the output directory, instead of parsing the whole export into memory")
+    parser.add_argument('--max-open-files', type=int, default=DEFAULT_MAX_OPEN_FILES,
+                        help=f"Spill files kept open at once with --memory-budget (default: {DEFAULT_MAX_OPEN_FILES})")
+    parser.add_argument('--epg-url', default=EPG_URL, help=f"Guide URL written to the playlist headers (default: {EPG_URL})")
+    parser.add_argument('--cfg-dir',
+                        help="Also write a <provider>.cfg per provider here, in the same single pass over the input")
+    parser.add_argument('--cfg-flavor', action='append', default=[], metavar='PROVIDER=FLAVOR',
+                        help="Converter flavor of a provider's cfg: generic or mytvsuper "
+                             "(default: mytvsuper for mytvsuper, generic for the rest)")
+    parser.add_argument('--cfg-compact', action='store_true', help="Write the --cfg-dir cfgs as compact JSON")
+    add_dedupe_arguments(parser)
+    add_epg_arguments(parser)
+    add_stats_arguments(parser)
+    args = parser.parse_args(argv)
+    if args.epg and args.bytes:
+        parser.error("--epg needs parsed channels and cannot be combined with --bytes")
+    if args.dedupe and args.bytes:
+        parser.error("--dedupe needs parsed channels and cannot be combined with --bytes")
+    if args.epg_split and not (args.epg and args.epg_base_url):
+        parser.error("--epg-split requires --epg and --epg-base-url")
+    if args.cfg_dir and (args.bytes or args.index or args.parse_workers > 1 or args.epg):
+        parser.error("--cfg-dir streams a single parse and cannot be combined with --bytes, --index, "
+                     "--parse-workers or --epg")
+    if args.memory_budget is not None:
+        if args.memory_budget <= 0 or args.max_open_files < 1:
+            parser.error("--memory-budget and --max-open-files must be positive")
+        if args.bytes or args.index or args.parse_workers > 1 or args.epg or args.dedupe or args.cfg_dir:
+            parser.error("--memory-budget streams a single parse and cannot be combined with --bytes, --index, "
+                         "--parse-workers, --epg, --dedupe or --cfg-dir")
+    args.cfg_flavors = {}
+    for value in args.cfg_flavor:
+        provider, _, flavor = value.partition('=')
+        if flavor not in ('generic', 'mytvsuper'):
+            parser.error(f"--cfg-flavor expects PROVIDER=generic or PROVIDER=mytvsuper, got '{value}'")
+        args.cfg_flavors[provider] = flavor
+
+    with instrument(args, 'o11_m3u_split_by_group') as stats:
+        provider_total, provider_counts, timings = split_playlist(args)
+        total_channels = sum(provider_counts.values())
+        if stats is not None:
+            # The splitter keeps its own stage timings, every stage handles each channel once
+            for stage, elapsed in timings.items():
+                stats.record(stage, elapsed, items=total_channels)
+            if timings.get('read'):
+                stats.stages['read']['bytes'] = os.path.getsize(args.input_file)
+            stats.count('providers', provider_total)
+            stats.count('channels', total_channels)
+
+    print(f"\nSummary:")
+    print(f"Total providers: {provider_total}")
+    print(f"Total channels: {total_channels}")
+
+    print("\nChannels per provider:")
+    for provider, count in sorted(provider_counts.items(), key=lambda x: x[1], reverse=True):
+        print(f"  {provider}: {count} channels")
+
+    print(f"\nOutput directory: {args.output_dir}")
+
+    print("\nTimings:")
+    for stage, elapsed in timings.items():
+        print(f"  {stage}: {elapsed:.3f}s")
@@ -0,0 +1,223 @@
+import argparse
+import gzip
+import hashlib
+import json
+import re
+import signal
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote
+
+from .o11_daemon import Daemon, load_config
+
+
+CONTENT_TYPES = {
+    'm3u': 'audio/x-mpegurl; charset=utf-8',
+    'cfg': 'application/json; charset=utf-8',
+    'json': 'application/json; charset=utf-8',
+}
+
+RANGE_PATTERN = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+# Bodies smaller than this are not worth compressing
+GZIP_MIN_SIZE = 256
+
+
+class Entry:
+    """One served file: its bytes, the gzipped bytes and their validators."""
+
+    __slots__ = ('data', 'gzip_data', 'etag', 'gzip_etag', 'content_type', 'last_modified')
+
+    def __init__(self, data, content_type):
+        digest = hashlib.sha1(data).hexdigest()
+        self.data = data
+        self.gzip_data = gzip.compress(data, compresslevel=6, mtime=0) if len(data) >= GZIP_MIN_SIZE else None
+        self.etag = f'"{digest}"'
+        self.gzip_etag = f'"{digest}-gz"'
+        self.content_type = content_type
+        self.last_modified = formatdate(time.time(), usegmt=True)
+
+
+class OutputStore:
+    """URL path -> Entry, replaced whole so a request never sees a half-rebuilt file."""
+
+    def __init__(self):
+        self.entries = {}
+        self.lock = threading.Lock()
+
+    def put(self, path, data, content_type):
+        entry = Entry(data, content_type)
+        with self.lock:
+            entries = dict(self.entries)
+            entries[path] = entry
+            self.entries = entries
+
+    def remove(self, path):
+        with self.lock:
+            entries = dict(self.entries)
+            entries.pop(path, None)
+            self.entries = entries
+
+    def get(self, path):
+        return self.entries.get(path)
+
+    def paths(self):
+        return sorted(self.entries)
+
+    def listener(self, kind, name, data):
+        """Daemon listener publishing each regenerated output as /<name>.<kind>, or dropping a removed one."""
+        if data is None:
+            self.remove(f"/{name}.{kind}")
+        else:
+            self.put(f"/{name}.{kind}", data, CONTENT_TYPES[kind])
+
+
+def parse_range(header, size):
+    """Return (start, end) for a single 'bytes=' range, None to ignore it, or False if unsatisfiable."""
+    match = RANGE_PATTERN.match(header.strip())
+    if not match or match.group(1) == match.group(2) == '':
+        return None
+
+    first, last = match.groups()
+    if first == '':
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0 or size == 0:
+            return False
+        return max(size - length, 0), size - 1
+
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        return False
+    return start, end
+
+
+class OutputRequestHandler(BaseHTTPRequestHandler):
+    """Serve OutputStore entries with ETag, gzip and Range support."""
+
+    server_version = "o11-scripts"
+    protocol_version = "HTTP/1.1"
+
+    def do_HEAD(self):
+        self.handle_request(send_body=False)
+
+    def do_GET(self):
+        self.handle_request(send_body=True)
+
+    def handle_request(self, send_body):
+        # Store keys are raw file names, e.g. /my tv.m3u
+        path = unquote(self.path.split('?', 1)[0])
+        if path == '/':
+            self.send_bytes(200, json.dumps(self.server.store.paths()).encode('utf-8'), CONTENT_TYPES['json'], send_body)
+            return
+        if path == '/stats' and self.server.stats is not None:
+            self.send_bytes(200, self.server.stats(), CONTENT_TYPES['json'], send_body)
+            return
+
+        entry = self.server.store.get(path)
+        if entry is None:
+            self.send_bytes(404, b'Not Found\n', 'text/plain', send_body)
+            return
+
+        range_header = self.headers.get('Range')
+        use_gzip = (
+            entry.gzip_data is not None
+            and range_header is None
+            and 'gzip' in self.headers.get('Accept-Encoding', '')
+        )
+        data = entry.gzip_data if use_gzip else entry.data
+        etag = entry.gzip_etag if use_gzip else entry.etag
+
+        if etag in self.headers.get('If-None-Match', '') or self.headers.get('If-None-Match', '').strip() == '*':
+            self.send_response(304)
+            self.send_validators(entry, etag)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        status = 200
+        content_range = None
+        if range_header is not None:
+            # A stale If-Range means the client's partial copy is outdated: send everything
+            if_range = self.headers.get('If-Range')
+            byte_range = parse_range(range_header, len(data)) if if_range in (None, etag) else None
+            if byte_range is False:
+                self.send_response(416)
+                self.send_header('Content-Range', f"bytes */{len(data)}")
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            if byte_range is not None:
+                start, end = byte_range
+                status = 206
+                content_range = f"bytes {start}-{end}/{len(data)}"
+                data = memoryview(data)[start:end + 1]
+
+        self.send_response(status)
+        self.send_header('Content-Type', entry.content_type)
+        self.send_header('Content-Length', str(len(data)))
+        self.send_header('Accept-Ranges', 'bytes')
+        self.send_header('Vary', 'Accept-Encoding')
+        self.send_validators(entry, etag)
+        if use_gzip:
+            self.send_header('Content-Encoding', 'gzip')
+        if content_range:
+            self.send_header('Content-Range', content_range)
+        self.end_headers()
+        if send_body:
+            self.wfile.write(data)
+
+    def send_validators(self, entry, etag):
+        self.send_header('ETag', etag)
+        self.send_header('Last-Modified', entry.last_modified)
+        self.send_header('Cache-Control', 'no-cache')
+
+    def send_bytes(self, status, data, content_type, send_body):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        if send_body:
+            self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+def create_server(store, host='0.0.0.0', port=8080, stats=None, verbose=False):
+    """Create a threaded server for store; stats, when given, returns the JSON bytes served at /stats."""
+    server = ThreadingHTTPServer((host, port), OutputRequestHandler)
+    server.daemon_threads = True
+    server.store = store
+    server.stats = stats
+    server.verbose = verbose
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="m3u-o11 serve")
+    parser.add_argument('config_file', help="o11_daemon.py JSON config")
+    parser.add_argument('--host', default='0.0.0.0', help="Listen address (default: 0.0.0.0)")
+    parser.add_argument('--port', type=int, default=8080, help="Listen port (default: 8080)")
+    parser.add_argument('--verbose', action='store_true', help="Log every request")
+    args = parser.parse_args(argv)
+
+    store = OutputStore()
+    daemon = Daemon(load_config(args.config_file))
+    daemon.add_listener(store.listener)
+
+    server = create_server(store, args.host, args.port, lambda: daemon.stats_json, args.verbose)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"Serving on http://{args.host}:{args.port}/")
+
+    signal.signal(signal.SIGTERM, daemon.stop)
+    signal.signal(signal.SIGINT, daemon.stop)
+    try:
+        daemon.run()
+    finally:
+        server.shutdown()
+        server.server_close()
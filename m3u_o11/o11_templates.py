@@ -0,0 +1,217 @@
+# Shared o11 provider/channel schemas.
+#
+# Channel objects are shallow copies of a constant template with only the
+# per-channel fields filled in. Nested values (Drm, Heartbeat, Headers,
+# SubtitlesList) are shared between channels and must be treated as read-only.
+
+CHANNEL_TEMPLATE = {
+    "Name": "",
+    "Id": "",
+    "LogoUrl": "",
+    "IsEvent": False,
+    "RecordEvent": False,
+    "Start": 0,
+    "End": 0,
+    "Mode": "live",
+    "RunningMode": "internalremuxer",
+    "OutputMode": "directhls",
+    "Proxy": "",
+    "Bind": "",
+    "Doh": "",
+    "NetworkScope": "script,manifest,media",
+    "OnDemand": True,
+    "Autostart": False,
+    "PipeOutputParams": "",
+    "ProtoOutputParams": "",
+    "SessionManifest": False,
+    "SpeedUp": True,
+    "UseCdm": False,
+    "Cdm": "",
+    "CdmType": "widevine",
+    "CdmMode": "internal",
+    "PRLAVersion": "",
+    "PRClientVersion": "",
+    "PRCustomData": "",
+    "NetworkOverride": False,
+    "ModeOverride": False,
+    "IgnoreUpdate": False,
+    "FixIvSize": False,
+    "TimeRange": False,
+    "ManifestScript": "",
+    "Manifest": "",
+    "ManifestType": "",
+    "ManifestInfo": "",
+    "Video": "best",
+    "Audio": "",
+    "Subtitles": "",
+    "VideoList": None,
+    "AudioList": None,
+    "SubtitlesList": None,
+    "Keys": None,
+    "Drm": {
+        "Vendor": None
+    },
+    "RangeStartTime": "",
+    "RangeEndTime": "",
+    "Heartbeat": {
+        "Url": "",
+        "Params": "",
+        "PeriodMs": 0,
+        "RandomMs": 0
+    },
+    "Headers": {
+        "Manifest": None,
+        "Media": None
+    }
+}
+
+MYTVSUPER_CHANNEL_TEMPLATE = {
+    **CHANNEL_TEMPLATE,
+    "SpeedUp": False,
+}
+
+MYTVSUPER_DASH_CHANNEL_TEMPLATE = {
+    **MYTVSUPER_CHANNEL_TEMPLATE,
+    "SpeedUp": True,
+    "ManifestType": "dash",
+    "ManifestInfo": "Format: <i><b>dash (live)</b></i><br>Best video: <i><b>2160p50</b></i><br>Duration: <i><b>2h59m52s</b></i><br>\nDRM: <i><b>widevine playready </b></i><br>",
+    "Audio": "au1_345",
+    "SubtitlesList": [
+        {
+            "Id": "s10000_chi",
+            "Desc": "chi",
+            "Kid": ""
+        },
+        {
+            "Id": "s10000_chs",
+            "Desc": "chs",
+            "Kid": ""
+        },
+        {
+            "Id": "s10000_eng",
+            "Desc": "eng",
+            "Kid": ""
+        }
+    ],
+}
+
+# (Id, Desc) of the DASH tracks, the Kid is filled in per channel
+MYTVSUPER_DASH_VIDEO_TRACKS = [
+    ("v15000000_33", "2160p50 (hev1.2.4.L153.b0, 14648Kb/s)"),
+]
+
+MYTVSUPER_DASH_AUDIO_TRACKS = [
+    ("au1_345", "au1 (mp4a.40.2, 48Khz, 125Kb/s)"),
+    ("au2_355", "au2 (mp4a.40.2, 48Khz, 125Kb/s)"),
+]
+
+PROVIDER_TEMPLATE = {
+    "Name": "",
+    "Id": "",
+    "RunningMode": "ffmpeg",
+    "OutputMode": "directhls",
+    "Script": "",
+    "LogoUrl": "",
+    "Proxy": "",
+    "Bind": "",
+    "Doh": "",
+    "NetworkScope": "script,manifest,media",
+    "UserAgent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/134.0.0.0 Safari/537.36 Edg/134.0.0.0",
+    "XForwardedFor": "",
+    "EventsAutorefresh": False,
+    "EventsAutoremove": False,
+    "ChannelsAutoremove": False,
+    "MaxConcurrentStreams": 0,
+    "LastEventIndex": 0,
+    "AlwaysResetSession": False,
+    "RestartDelay": 30,
+    "PipeOutputCmdFormated": "tsplay -pace-pcr2-pmt -stdin %s",
+    "NbAnnouncedFragments": 0,
+    "HlsFragmentsDuration": 0,
+    "PlaylistDuration": 15,
+    "AutorestartPeriod": 0,
+    "NoRestartOnError": False,
+    "RestartFinished": False,
+    "NoRestartOnTrackChange": False,
+    "PlaybackDelay": 0,
+    "RandomAutostartPeriod": 0,
+    "SequencialAutostartPeriod": 0,
+    "EpgTimezone": "",
+    "ReuseEventIndex": False,
+    "EventsRefreshPeriod": 3600,
+    "HttpGetRetries": 2,
+    "NoWaitFullPlaylist": False,
+    "ContinuousPlayback": False,
+    "IgnoreStaticDash": False,
+    "UseDashDelay": False,
+    "StallDetectTimeout": 60,
+    "Headers": None,
+    "VmxUniqueId": "",
+    "Channels": None
+}
+
+# Per-flavor overrides of the provider template
+PROVIDER_FLAVORS = {
+    'generic': {},
+    'mytvsuper': {"RunningMode": "internalremuxer"},
+}
+
+
+def create_channel_object(channel):
+    """Create channel object in the required format."""
+    obj = CHANNEL_TEMPLATE.copy()
+    obj["Name"] = f"{channel['group']} - {channel['name']}"
+    obj["Id"] = channel['id']
+    obj["LogoUrl"] = channel['logo']
+    obj["Manifest"] = channel['url']
+    return obj
+
+
+def create_mytvsuper_channel_object(channel, manifest_fields=None):
+    """Create channel object in the required format for MyTV Super.
+
+    manifest_fields, from mpd_introspect.manifest_channel_fields(), replaces
+    the default DASH track lists with the ones read from the real manifest.
+    """
+    license_key = channel.get('license_key')
+
+    if channel.get('manifest_type') == "mpd":
+        obj = MYTVSUPER_DASH_CHANNEL_TEMPLATE.copy()
+
+        # Extract the KID from the license key if available
+        kid = license_key.split(':')[0] if license_key else ""
+        if manifest_fields:
+            obj.update(manifest_fields)
+            # Tracks without cenc:default_KID in the manifest use the license key's
+            for field in ("VideoList", "AudioList"):
+                if obj[field]:
+                    obj[field] = [track if track["Kid"] else {**track, "Kid": kid} for track in obj[field]]
+        else:
+            obj["VideoList"] = [
+                {"Id": track_id, "Desc": desc, "Kid": kid}
+                for track_id, desc in MYTVSUPER_DASH_VIDEO_TRACKS
+            ]
+            obj["AudioList"] = [
+                {"Id": track_id, "Desc": desc, "Kid": kid}
+                for track_id, desc in MYTVSUPER_DASH_AUDIO_TRACKS
+            ]
+    else:
+        obj = MYTVSUPER_CHANNEL_TEMPLATE.copy()
+
+    obj["Name"] = f"{channel['group']} - {channel['name']}"
+    obj["Id"] = channel['id']
+    obj["LogoUrl"] = channel['logo']
+    obj["Manifest"] = channel['url']
+    if license_key:
+        obj["Keys"] = [license_key]
+    return obj
+
+
+def create_provider_object(name, channels, flavor='generic'):
+    """Create provider object with channels."""
+    obj = PROVIDER_TEMPLATE.copy()
+    obj.update(PROVIDER_FLAVORS[flavor])
+    obj["Name"] = name
+    obj["Id"] = name
+    obj["Channels"] = channels
+    return obj
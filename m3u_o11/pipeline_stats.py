@@ -0,0 +1,207 @@
+import contextlib
+import json
+import sys
+import time
+
+from .atomic_io import atomic_write
+
+
+class PipelineStats:
+    """Per-stage timings and counters of one pipeline run.
+
+    Stage times are exclusive: when a timed iterator pulls from another
+    timed iterator (parse pulling decoded lines, serialize pulling
+    transformed channels) the inner stage's time is not counted again in
+    the outer one, so the stage times add up to the wall time.
+    """
+
+    def __init__(self, name, trace_malloc=False):
+        self.name = name
+        self.trace_malloc = trace_malloc
+        self.stages = {}
+        self.counters = {}
+        self._stack = []
+        self._started_at = time.time()
+        self._start = time.perf_counter()
+        if trace_malloc:
+            import tracemalloc
+
+            tracemalloc.start()
+
+    def _stage(self, name):
+        if name not in self.stages:
+            self.stages[name] = {'seconds': 0.0, 'items': 0, 'bytes': 0}
+        return self.stages[name]
+
+    def _enter(self):
+        self._stack.append(0.0)
+        return time.perf_counter()
+
+    def _exit(self, stage, start):
+        elapsed = time.perf_counter() - start
+        child = self._stack.pop()
+        stage['seconds'] += elapsed - child
+        if self._stack:
+            self._stack[-1] += elapsed
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        """Time a block as the named stage; yields the stage dict for extra counts."""
+        stage = self._stage(name)
+        start = self._enter()
+        try:
+            yield stage
+        finally:
+            self._exit(stage, start)
+
+    def timed_iter(self, iterable, name, measure=None):
+        """Yield from iterable, charging the time spent producing items to the named stage.
+
+        measure(item), when given, is added to the stage's bytes.
+        """
+        stage = self._stage(name)
+        iterator = iter(iterable)
+        while True:
+            start = self._enter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                self._exit(stage, start)
+            stage['items'] += 1
+            if measure is not None:
+                stage['bytes'] += measure(item)
+            yield item
+
+    def timed_writer(self, f, name):
+        """Wrap a binary file so its write() calls are charged to the named stage."""
+        return TimedWriter(self, f, name)
+
+    def record(self, name, seconds=0.0, items=0, nbytes=0):
+        """Add an externally measured duration and counts to a stage."""
+        stage = self._stage(name)
+        stage['seconds'] += seconds
+        stage['items'] += items
+        stage['bytes'] += nbytes
+
+    def count(self, name, value=1):
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def to_dict(self):
+        wall = time.perf_counter() - self._start
+        stages = {}
+        for name, stage in self.stages.items():
+            stages[name] = {
+                'seconds': round(stage['seconds'], 6),
+                'items': stage['items'],
+                'bytes': stage['bytes'],
+                'items_per_second': round(stage['items'] / stage['seconds'], 1) if stage['seconds'] else None,
+            }
+
+        result = {
+            'entry_point': self.name,
+            'started_at': self._started_at,
+            'wall_seconds': round(wall, 6),
+            'stages': stages,
+            'counters': self.counters,
+            'peak_rss_mb': peak_rss_mb(),
+        }
+        if self.trace_malloc:
+            import tracemalloc
+
+            current, peak = tracemalloc.get_traced_memory()
+            top = tracemalloc.take_snapshot().statistics('lineno')[:10]
+            result['tracemalloc'] = {
+                'current_mb': round(current / (1024 * 1024), 2),
+                'peak_mb': round(peak / (1024 * 1024), 2),
+                'top': [
+                    {'where': f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+                     'kb': round(stat.size / 1024, 1), 'count': stat.count}
+                    for stat in top
+                ],
+            }
+        return result
+
+    def write_json(self, path):
+        """Write the metrics to path, or to stderr for '-' (stdout may carry the cfg)."""
+        data = json.dumps(self.to_dict(), indent=4).encode('utf-8')
+        if path == '-':
+            sys.stderr.buffer.write(data + b'\n')
+            sys.stderr.buffer.flush()
+        else:
+            atomic_write(path, data)
+
+
+def peak_rss_mb():
+    """Peak resident memory of this process in MB, or None where the resource module is missing (Windows)."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+                 / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def stats_stage(stats, name):
+    """stats.stage(name), or a no-op context manager when stats is None."""
+    return stats.stage(name) if stats is not None else contextlib.nullcontext()
+
+
+class TimedWriter:
+    """Binary file wrapper charging write() time and bytes to a PipelineStats stage."""
+
+    def __init__(self, stats, f, name):
+        self.stats = stats
+        self.f = f
+        self.stage = stats._stage(name)
+
+    def write(self, data):
+        start = self.stats._enter()
+        try:
+            return self.f.write(data)
+        finally:
+            self.stats._exit(self.stage, start)
+            self.stage['items'] += 1
+            self.stage['bytes'] += len(data)
+
+    def __getattr__(self, name):
+        return getattr(self.f, name)
+
+
+def add_stats_arguments(parser):
+    """Add the --profile/--stats-json instrumentation options to an argparse parser."""
+    parser.add_argument('--profile', metavar='PSTATS_FILE',
+                        help="Run under cProfile, save the pstats to this file and print the top functions")
+    parser.add_argument('--stats-json', metavar='FILE',
+                        help="Write per-stage timings, counts and peak memory as JSON ('-' for stderr)")
+    parser.add_argument('--trace-malloc', action='store_true',
+                        help="Add tracemalloc peak and top allocation sites to --stats-json (slower)")
+
+
+@contextlib.contextmanager
+def instrument(args, name):
+    """Apply the add_stats_arguments() options around a run, yielding PipelineStats or None."""
+    stats = PipelineStats(name, trace_malloc=args.trace_malloc) if args.stats_json else None
+    profiler = None
+    if args.profile:
+        import cProfile
+
+        profiler = cProfile.Profile()
+        profiler.enable()
+    try:
+        yield stats
+    finally:
+        if profiler is not None:
+            import pstats
+
+            profiler.disable()
+            profiler.dump_stats(args.profile)
+            print(f"\nProfile saved to {args.profile}, top functions by cumulative time:", file=sys.stderr)
+            pstats.Stats(profiler, stream=sys.stderr).sort_stats('cumulative').print_stats(20)
+        if stats is not None:
+            stats.write_json(args.stats_json)
+            if args.stats_json != '-':
+                print(f"Stats saved to {args.stats_json}", file=sys.stderr)
+
@@ -0,0 +1,346 @@
+import os
+import sys
+from collections import OrderedDict
+
+from . import m3u_to_provider_channels
+from . import m3u_to_provider_channels_mytvsuper
+from .atomic_io import atomic_open, make_temp, replace_with_temp
+from .cfg_delta import update_provider_cfg
+from .cfg_serializer import ProviderStreamWriter, write_provider_cfg_stream, write_provider_stream
+from .o11_m3u_split_by_group import (
+    DEFAULT_MAX_OPEN_FILES,
+    SPLIT_HEADER,
+    iter_channels_by_provider,
+    sanitize_filename,
+)
+from .o11_templates import create_channel_object, create_mytvsuper_channel_object, create_provider_object
+from .pipeline_stats import stats_stage
+
+
+# flavor -> (parser, channel builder, provider builder)
+FLAVORS = {
+    'generic': (
+        m3u_to_provider_channels.iter_m3u,
+        create_channel_object,
+        create_provider_object,
+    ),
+    'mytvsuper': (
+        m3u_to_provider_channels_mytvsuper.iter_mytvsuper_m3u,
+        create_mytvsuper_channel_object,
+        m3u_to_provider_channels_mytvsuper.create_provider_object,
+    ),
+}
+
+# Providers converted with another flavor than 'generic' unless told otherwise
+DEFAULT_CFG_FLAVORS = {'mytvsuper': 'mytvsuper'}
+
+BUFFER_SIZE = 1024 * 1024
+
+
+def convert_m3u_lines(lines, provider_name, flavor='generic', output_file=None, incremental=False,
+                      report_file=None, compact=False, probe=None, mpd=None, sharder=None, stats=None):
+    """Convert M3U lines with one of FLAVORS to provider channels JSON format and return the channel count.
+
+    mpd is only for flavors whose channel builder takes manifest fields.
+    """
+    parse, create_channel, create_provider = FLAVORS[flavor]
+
+    # Parse M3U lines as they arrive
+    channels = parse(lines)
+    if stats is not None:
+        channels = stats.timed_iter(channels, 'parse')
+    if probe is not None:
+        # Probing checks all URLs at once, so the channels are collected first
+        with stats_stage(stats, 'probe'):
+            channels = probe.filter_channels(channels)
+
+    if mpd is not None:
+        from .mpd_introspect import manifest_channel_fields
+
+        # Read the real tracks of every DASH manifest before building the channels
+        channels = list(channels)
+        with stats_stage(stats, 'mpd'):
+            manifests = mpd.inspect(channel['url'] for channel in channels if channel.get('manifest_type') == "mpd")
+        manifest_fields = {url: manifest_channel_fields(info) for url, info in manifests.items() if info}
+        build_channel = create_channel
+
+        def create_channel(channel):
+            return build_channel(channel, manifest_fields.get(channel['url']))
+
+    if sharder is not None and output_file:
+        # Balancing the shards needs every channel's weight first
+        provider_channels = (create_channel(channel) for channel in channels)
+        if stats is not None:
+            provider_channels = stats.timed_iter(provider_channels, 'transform')
+        provider_channels = list(provider_channels)
+        with stats_stage(stats, 'serialize'):
+            sharder.write(output_file, provider_name, provider_channels, create_provider, compact)
+        return len(provider_channels)
+
+    if incremental and output_file:
+        # The diff needs every channel object at once
+        provider_channels = (create_channel(channel) for channel in channels)
+        if stats is not None:
+            provider_channels = stats.timed_iter(provider_channels, 'transform')
+        provider_channels = list(provider_channels)
+        provider = create_provider(provider_name, provider_channels)
+        with stats_stage(stats, 'serialize'):
+            update_provider_cfg(output_file, provider, report_file, compact)
+        return len(provider_channels)
+
+    # Transform channels to required format and write each one as it is parsed
+    provider = create_provider(provider_name, None)
+    provider_channels = (create_channel(channel) for channel in channels)
+    if stats is not None:
+        provider_channels = stats.timed_iter(provider_channels, 'transform')
+
+    # Output JSON
+    if output_file:
+        count = write_provider_cfg_stream(output_file, provider, provider_channels, compact=compact, stats=stats)
+        print(f"Output saved to {output_file}")
+    else:
+        count = write_provider_stream(sys.stdout.buffer, provider, provider_channels, compact=compact, stats=stats)
+        sys.stdout.buffer.write(b'\n')
+
+    return count
+
+
+class ProviderReplaced(Exception):
+    """Thrown into a sink whose output file was taken over by another provider."""
+
+
+class PlaylistSink:
+    """Stream one split playlist, byte-identical to write_provider_m3u_file()."""
+
+    def __init__(self, path, header):
+        self._context = atomic_open(path, buffering=BUFFER_SIZE)
+        self.f = self._context.__enter__()
+        self.f.write((header if header else "#EXTM3U").encode('utf-8') + b'\n')
+        self.count = 0
+
+    def write(self, extinf, url):
+        self.f.write(f"{extinf}\n{url}\n".encode('utf-8'))
+        self.count += 1
+
+    def close(self, exc_info=(None, None, None)):
+        self._context.__exit__(*exc_info)
+        return self.count
+
+
+class SpillPool:
+    """Memory budget and LRU of open spill files shared by the SpillSinks of one split.
+
+    When the buffered channels go over budget bytes, the largest buffers are
+    appended to their spill files until half the budget is free. At most
+    max_open spill files are open at once, the least recently used one is
+    closed to make room.
+    """
+
+    def __init__(self, budget, max_open=DEFAULT_MAX_OPEN_FILES):
+        self.budget = budget
+        self.max_open = max_open
+        self.buffered = 0
+        self.sinks = set()
+        self.files = OrderedDict()
+        self.spills = 0
+        self.spilled_bytes = 0
+
+    def add(self, sink, size):
+        self.buffered += size
+        if self.buffered > self.budget:
+            self.spill()
+
+    def spill(self):
+        for sink in sorted(self.sinks, key=lambda sink: len(sink.buffer), reverse=True):
+            if self.buffered <= self.budget // 2:
+                break
+            self.file(sink).write(sink.buffer)
+            self.buffered -= len(sink.buffer)
+            self.spills += 1
+            self.spilled_bytes += len(sink.buffer)
+            sink.buffer.clear()
+
+    def file(self, sink):
+        """Return the open spill file of sink, opening it and closing the least recently used if needed."""
+        f = self.files.get(sink)
+        if f is not None:
+            self.files.move_to_end(sink)
+            return f
+        while len(self.files) >= self.max_open:
+            self.files.popitem(last=False)[1].close()
+        f = self.files[sink] = sink.open_spill()
+        return f
+
+    def release(self, sink):
+        """Forget sink, closing its spill file and freeing its share of the budget."""
+        self.sinks.discard(sink)
+        self.buffered -= len(sink.buffer)
+        f = self.files.pop(sink, None)
+        if f is not None:
+            f.close()
+
+
+class SpillSink:
+    """Buffer one split playlist in memory, spilling to a temp file next to it when the pool says so.
+
+    The temp file starts with the header, so finishing it is appending what
+    is still buffered and renaming it into place; the output is the same as
+    PlaylistSink's.
+    """
+
+    def __init__(self, path, header, pool):
+        self.path = path
+        self.header = (header if header else "#EXTM3U").encode('utf-8') + b'\n'
+        self.pool = pool
+        self.buffer = bytearray()
+        self.tmp_path = None
+        self.count = 0
+        pool.sinks.add(self)
+
+    def write(self, extinf, url):
+        data = f"{extinf}\n{url}\n".encode('utf-8')
+        self.buffer += data
+        self.count += 1
+        self.pool.add(self, len(data))
+
+    def open_spill(self):
+        if self.tmp_path is not None:
+            return open(self.tmp_path, 'ab')
+        fd, self.tmp_path = make_temp(self.path)
+        f = os.fdopen(fd, 'wb')
+        f.write(self.header)
+        return f
+
+    def close(self, exc_info=(None, None, None)):
+        self.pool.release(self)
+        if exc_info[0] is not None:
+            if self.tmp_path is not None:
+                os.unlink(self.tmp_path)
+        elif self.tmp_path is None:
+            with atomic_open(self.path) as f:
+                f.write(self.header)
+                f.write(self.buffer)
+        else:
+            try:
+                with open(self.tmp_path, 'ab') as f:
+                    f.write(self.buffer)
+                replace_with_temp(self.tmp_path, self.path)
+            except BaseException:
+                os.unlink(self.tmp_path)
+                raise
+        self.buffer = bytearray()
+        return self.count
+
+
+class CfgSink:
+    """Stream one provider cfg, converting each split channel as it arrives.
+
+    The flavor's own parser reads the rewritten #EXTINF line, so the cfg is
+    exactly what converting the split playlist afterwards would give.
+    """
+
+    def __init__(self, path, name, flavor, compact=False):
+        self.parse, self.create_channel, create_provider = FLAVORS[flavor]
+        self._context = atomic_open(path, buffering=BUFFER_SIZE)
+        self.writer = ProviderStreamWriter(self._context.__enter__(), create_provider(name, None), compact=compact)
+
+    def write(self, extinf, url):
+        for channel in self.parse((extinf, url)):
+            self.writer.write_channel(self.create_channel(channel))
+
+    def close(self, exc_info=(None, None, None)):
+        try:
+            if exc_info[0] is None:
+                self.writer.close()
+        finally:
+            self._context.__exit__(*exc_info)
+        return self.writer.count
+
+
+class ProviderFanOut:
+    """Route (provider, extinf, url) records to per-provider playlist and cfg sinks.
+
+    A provider's sinks are opened when it first appears, so nothing is held
+    in memory but the write buffers. As in write_provider_m3u_files(), when
+    two providers sanitize to the same file name the one that appears last
+    wins and the earlier one's outputs are dropped. With a SpillPool the
+    playlists are buffered in SpillSinks that share its memory budget and
+    open file limit, instead of keeping one open file per provider.
+    """
+
+    def __init__(self, output_dir, header=SPLIT_HEADER, cfg_dir=None, flavors=None, compact=False, pool=None):
+        self.output_dir = output_dir
+        self.header = header
+        self.cfg_dir = cfg_dir
+        self.flavors = {**DEFAULT_CFG_FLAVORS, **(flavors or {})}
+        self.compact = compact
+        self.pool = pool
+        self.providers = set()
+        self.sinks = {}
+        # safe name -> provider currently writing it
+        self.owners = {}
+        os.makedirs(output_dir, exist_ok=True)
+        if cfg_dir:
+            os.makedirs(cfg_dir, exist_ok=True)
+
+    def _open(self, provider):
+        self.providers.add(provider)
+        safe_name = sanitize_filename(provider)
+        previous = self.owners.get(safe_name)
+        if previous is not None:
+            error = ProviderReplaced(f"{previous} replaced by {provider}")
+            for sink in self.sinks.pop(previous):
+                sink.close((ProviderReplaced, error, None))
+            # Later channels of the replaced provider are dropped
+            self.sinks[previous] = ()
+
+        path = os.path.join(self.output_dir, f"{safe_name}.m3u")
+        sinks = [SpillSink(path, self.header, self.pool) if self.pool else PlaylistSink(path, self.header)]
+        if self.cfg_dir:
+            flavor = self.flavors.get(safe_name, 'generic')
+            sinks.append(CfgSink(os.path.join(self.cfg_dir, f"{safe_name}.cfg"), safe_name, flavor,
+                                 compact=self.compact))
+        self.owners[safe_name] = provider
+        self.sinks[provider] = sinks
+        return sinks
+
+    def write(self, provider, extinf, url):
+        sinks = self.sinks.get(provider)
+        if sinks is None:
+            sinks = self._open(provider)
+        for sink in sinks:
+            sink.write(extinf, url)
+
+    def close(self, exc_info=(None, None, None)):
+        """Finish every output and return {safe provider name: channel count}."""
+        counts = {}
+        for safe_name, provider in self.owners.items():
+            sinks = self.sinks[provider]
+            for sink in sinks:
+                sink.close(exc_info)
+            counts[safe_name] = sinks[0].count
+        return counts
+
+
+def write_providers(records, output_dir, header=SPLIT_HEADER, cfg_dir=None, flavors=None, compact=False,
+                    pool=None):
+    """Stream (provider, extinf, url) records into split playlists and, with cfg_dir, provider cfgs.
+
+    flavors maps safe provider names to a FLAVORS key, on top of
+    DEFAULT_CFG_FLAVORS. Returns the number of providers seen and the
+    channel count per written provider, like split_m3u_bytes().
+    """
+    fanout = ProviderFanOut(output_dir, header, cfg_dir, flavors, compact, pool)
+    try:
+        for provider, extinf, url in records:
+            fanout.write(provider, extinf, url)
+    except BaseException:
+        fanout.close(sys.exc_info())
+        raise
+    return len(fanout.providers), fanout.close()
+
+
+def split_and_convert(lines, output_dir, header=SPLIT_HEADER, cfg_dir=None, flavors=None, compact=False,
+                      pool=None):
+    """Split an o11 export into playlists and, with cfg_dir, provider cfgs in one pass over lines."""
+    return write_providers(iter_channels_by_provider(lines), output_dir, header, cfg_dir, flavors, compact, pool)
@@ -0,0 +1,181 @@
+import json
+import os
+import sys
+import threading
+import time
+from collections import defaultdict, deque
+from urllib.parse import urlsplit
+
+from .atomic_io import atomic_write
+from .m3u_fetch import create_session
+
+
+DEFAULT_PROBE_WORKERS = 64
+DEFAULT_PROBE_PER_HOST = 4
+DEFAULT_PROBE_TIMEOUT = 5.0
+DEFAULT_PROBE_TTL = 3600
+
+# Bytes requested by the partial GET fallback
+PROBE_RANGE = 'bytes=0-1023'
+
+DEAD_CHANNEL_PREFIX = "[dead] "
+
+
+def probe_url(session, url, timeout):
+    """Check one URL with HEAD, falling back to a small ranged GET, return (ok, detail)."""
+    import requests
+
+    try:
+        response = session.head(url, timeout=timeout, allow_redirects=True)
+        response.close()
+        if response.status_code < 400:
+            return True, response.status_code
+
+        # Many stream servers reject HEAD; ask for the first bytes instead
+        with session.get(url, timeout=timeout, headers={'Range': PROBE_RANGE}, stream=True) as response:
+            if response.status_code >= 400:
+                return False, response.status_code
+            next(response.iter_content(1024), None)
+            return True, response.status_code
+    except requests.RequestException as e:
+        return False, type(e).__name__
+
+
+def interleave_by_host(urls):
+    """Order urls round-robin across hosts so workers do not all wait on one host."""
+    queues = defaultdict(deque)
+    for url in urls:
+        queues[urlsplit(url).netloc].append(url)
+
+    ordered = []
+    while queues:
+        for host in list(queues):
+            ordered.append(queues[host].popleft())
+            if not queues[host]:
+                del queues[host]
+    return ordered
+
+
+class StreamProber:
+    """Probe channel URLs concurrently and drop or mark the dead ones.
+
+    At most ``workers`` requests run at once and at most ``per_host`` of
+    them against the same host. Results are kept for ``ttl`` seconds in
+    ``cache_file`` when given, so repeated runs only probe what expired.
+    Non-HTTP URLs are not probed and count as alive.
+    """
+
+    def __init__(self, workers=DEFAULT_PROBE_WORKERS, per_host=DEFAULT_PROBE_PER_HOST, timeout=DEFAULT_PROBE_TIMEOUT,
+                 cache_file=None, ttl=DEFAULT_PROBE_TTL, drop=False, session=None):
+        self.workers = workers
+        self.per_host = per_host
+        self.timeout = timeout
+        self.cache_file = cache_file
+        self.ttl = ttl
+        self.drop = drop
+        self.session = session
+        self.lock = threading.Lock()
+        self.host_limits = defaultdict(lambda: threading.BoundedSemaphore(self.per_host))
+        self.results = self._load_cache()
+
+    def _load_cache(self):
+        if not self.cache_file or not os.path.exists(self.cache_file):
+            return {}
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_cache(self):
+        if self.cache_file:
+            with self.lock:
+                data = json.dumps(self.results, separators=(',', ':')).encode('utf-8')
+            atomic_write(self.cache_file, data)
+
+    def _probe_one(self, session, url):
+        with self.lock:
+            limit = self.host_limits[urlsplit(url).netloc]
+        with limit:
+            ok, detail = probe_url(session, url, self.timeout)
+        with self.lock:
+            self.results[url] = [ok, detail, time.time()]
+        return ok
+
+    def probe(self, urls):
+        """Probe urls not cached within the TTL and return {url: ok}."""
+        from concurrent.futures import ThreadPoolExecutor
+
+        now = time.time()
+        status = {}
+        pending = []
+        for url in dict.fromkeys(urls):
+            if not url.startswith(('http://', 'https://')):
+                status[url] = True
+                continue
+            cached = self.results.get(url)
+            if cached is not None and now - cached[2] < self.ttl:
+                status[url] = cached[0]
+            else:
+                pending.append(url)
+
+        if pending:
+            session = self.session or create_session(self.workers)
+            try:
+                with ThreadPoolExecutor(max_workers=min(self.workers, len(pending))) as executor:
+                    ordered = interleave_by_host(pending)
+                    for url, ok in zip(ordered, executor.map(lambda url: self._probe_one(session, url), ordered)):
+                        status[url] = ok
+            finally:
+                if self.session is None:
+                    session.close()
+            self._save_cache()
+
+        dead = sum(1 for ok in status.values() if not ok)
+        print(f"Probed {len(status)} URLs ({len(pending)} checked, {len(status) - len(pending)} cached): "
+              f"{dead} dead in {time.time() - now:.2f}s", file=sys.stderr, flush=True)
+        return status
+
+    def filter_channels(self, channels):
+        """Probe each channel's 'url' and drop dead channels, or prefix their name when not dropping."""
+        channels = list(channels)
+        status = self.probe(channel['url'] for channel in channels)
+
+        kept = []
+        for channel in channels:
+            if not status[channel['url']]:
+                if self.drop:
+                    continue
+                channel = {**channel, 'name': DEAD_CHANNEL_PREFIX + channel['name']}
+            kept.append(channel)
+        return kept
+
+
+def add_probe_arguments(parser):
+    """Add the stream probe options to an argparse parser."""
+    parser.add_argument('--probe', action='store_true',
+                        help=f"Check every channel URL first and prefix dead channel names with '{DEAD_CHANNEL_PREFIX}'")
+    parser.add_argument('--probe-drop', action='store_true', help="Leave dead channels out instead of marking them")
+    parser.add_argument('--probe-workers', type=int, default=DEFAULT_PROBE_WORKERS,
+                        help=f"Concurrent probes (default: {DEFAULT_PROBE_WORKERS})")
+    parser.add_argument('--probe-per-host', type=int, default=DEFAULT_PROBE_PER_HOST,
+                        help=f"Concurrent probes against one host (default: {DEFAULT_PROBE_PER_HOST})")
+    parser.add_argument('--probe-timeout', type=float, default=DEFAULT_PROBE_TIMEOUT,
+                        help=f"Probe timeout in seconds (default: {DEFAULT_PROBE_TIMEOUT})")
+    parser.add_argument('--probe-cache', help="Keep probe results in this JSON file")
+    parser.add_argument('--probe-ttl', type=float, default=DEFAULT_PROBE_TTL,
+                        help=f"Reuse cached probe results for this many seconds (default: {DEFAULT_PROBE_TTL})")
+
+
+def prober_from_args(args):
+    """Build a StreamProber from parsed arguments, or None when probing is off."""
+    if not (args.probe or args.probe_drop):
+        return None
+    return StreamProber(
+        workers=args.probe_workers,
+        per_host=args.probe_per_host,
+        timeout=args.probe_timeout,
+        cache_file=args.probe_cache,
+        ttl=args.probe_ttl,
+        drop=args.probe_drop,
+    )
@@ -0,0 +1,98 @@
+import json
+
+from m3u_o11.cfg_delta import apply_channel_diff, diff_channels, diff_report, update_provider_cfg
+
+
+def channel(channel_id, manifest, name="Channel", **fields):
+    return {'Id': channel_id, 'Manifest': manifest, 'Name': name, **fields}
+
+
+def round_trip(old, new):
+    diff = diff_channels(old, new)
+    return diff, apply_channel_diff(old, diff)
+
+
+def test_identical_lists_have_no_diff():
+    channels = [channel('a', 'http://a'), channel('b', 'http://b')]
+    diff, patched = round_trip(channels, [dict(c) for c in channels])
+    assert diff == {'added': [], 'removed': [], 'changed': {}}
+    assert patched == channels
+
+
+def test_round_trip_add_remove_change():
+    old = [channel('a', 'http://a'), channel('b', 'http://b'), channel('c', 'http://c')]
+    new = [channel('a', 'http://a', name="Renamed"), channel('c', 'http://c'), channel('d', 'http://d')]
+    diff, patched = round_trip(old, new)
+
+    report = diff_report(diff)
+    assert report['removed'] == ['b']
+    assert report['changed'] == [{'Id': 'a', 'Fields': {'Name': "Renamed"}}]
+    assert [c['Id'] for c in report['added']] == ['d']
+    assert patched == new
+
+
+def test_changed_fields_keep_fields_edited_in_o11():
+    old = [channel('a', 'http://a', Mode="edited by hand")]
+    new = [channel('a', 'http://a', name="Renamed")]
+    _, patched = round_trip(old, new)
+    assert patched == [channel('a', 'http://a', name="Renamed", Mode="edited by hand")]
+
+
+def test_removing_one_of_a_shared_id_is_one_entry():
+    old = [channel('a', f'http://a/{n}') for n in range(5)]
+    new = old[1:]
+    diff, patched = round_trip(old, new)
+    assert len(diff['removed']) == 1
+    assert diff['added'] == [] and diff['changed'] == {}
+    assert patched == new
+
+
+def test_removing_one_of_several_channels_without_id_is_one_entry():
+    old = [channel("", f'http://x/{n}') for n in range(4)]
+    new = old[:1] + old[2:]
+    diff, patched = round_trip(old, new)
+    assert diff_report(diff)['removed'] == ['http://x/1']
+    assert diff['added'] == [] and diff['changed'] == {}
+    assert patched == new
+
+
+def test_moved_manifest_with_unique_id_is_a_change():
+    old = [channel('a', 'http://old/a'), channel('b', 'http://b')]
+    new = [channel('a', 'http://new/a'), channel('b', 'http://b')]
+    diff, patched = round_trip(old, new)
+    assert diff_report(diff) == {'added': [], 'removed': [],
+                                 'changed': [{'Id': 'a', 'Fields': {'Manifest': 'http://new/a'}}]}
+    # The channel keeps its place
+    assert patched == new
+
+
+def test_exact_duplicates_are_counted():
+    old = [channel('a', 'http://a')] * 3
+    new = [channel('a', 'http://a')] * 2
+    diff, patched = round_trip(old, new)
+    assert len(diff['removed']) == 1
+    assert patched == new
+
+
+def test_update_provider_cfg_writes_only_when_changed(tmp_path):
+    path = tmp_path / 'provider.cfg'
+    provider = {'Name': "P", 'Channels': [channel('a', 'http://a')]}
+    update_provider_cfg(str(path), provider)
+    assert json.loads(path.read_text(encoding='utf-8')) == provider
+
+    # Provider settings edited in o11 survive a patch
+    saved = json.loads(path.read_text(encoding='utf-8'))
+    saved['MaxConcurrentStreams'] = 3
+    path.write_text(json.dumps(saved), encoding='utf-8')
+    mtime = path.stat().st_mtime_ns
+    diff = update_provider_cfg(str(path), provider)
+    assert diff == {'added': [], 'removed': [], 'changed': {}}
+    assert path.stat().st_mtime_ns == mtime
+
+    report = tmp_path / 'patch.json'
+    provider['Channels'].append(channel('b', 'http://b'))
+    update_provider_cfg(str(path), provider, str(report))
+    patched = json.loads(path.read_text(encoding='utf-8'))
+    assert patched['MaxConcurrentStreams'] == 3
+    assert [c['Id'] for c in patched['Channels']] == ['a', 'b']
+    assert [c['Id'] for c in json.loads(report.read_text(encoding='utf-8'))['added']] == ['b']
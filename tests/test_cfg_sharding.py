@@ -0,0 +1,97 @@
+import json
+
+from m3u_o11.cfg_sharding import CfgSharder, assign_shards, estimate_bitrate, shard_path
+from m3u_o11.o11_templates import create_provider_object
+
+
+NODES = ['p-1', 'p-2', 'p-3']
+
+
+def loads(weights, assignment, nodes=NODES):
+    load = [0] * len(nodes)
+    for weight, node in zip(weights, assignment):
+        load[node] += weight
+    return load
+
+
+def test_assignment_is_deterministic():
+    keys = [f"ch{i}" for i in range(200)]
+    weights = [1] * len(keys)
+    assert assign_shards(keys, weights, NODES, [1, 1, 1]) == assign_shards(keys, weights, NODES, [1, 1, 1])
+
+
+def test_load_stays_within_capacity():
+    keys = [f"ch{i}" for i in range(300)]
+    weights = [1 + i % 7 for i in range(300)]
+    assignment, load = assign_shards(keys, weights, NODES, [1, 1, 1], load_factor=1.1)
+    assert load == loads(weights, assignment)
+    capacity = sum(weights) / 3 * 1.1
+    assert max(load) <= capacity
+
+
+def test_uneven_shares_size_the_load():
+    keys = [f"ch{i}" for i in range(400)]
+    weights = [1] * len(keys)
+    _, load = assign_shards(keys, weights, ['a', 'b'], [3, 1], load_factor=1.0)
+    assert load == [300, 100]
+
+
+def test_key_too_heavy_for_any_node_goes_to_the_least_loaded():
+    assignment, load = assign_shards(['big', 'small'], [100, 1], ['a', 'b'], [1, 1], load_factor=1.0)
+    assert sorted(load) == [1, 100]
+    assert assignment[0] != assignment[1]
+
+
+def test_previous_assignment_is_sticky_while_it_fits():
+    keys = [f"ch{i}" for i in range(60)]
+    weights = [1] * len(keys)
+    assignment, _ = assign_shards(keys, weights, NODES, [1, 1, 1])
+    # Pin one channel elsewhere: it stays there since that node has room
+    moved = keys[0]
+    other = (assignment[0] + 1) % 3
+    previous = {key: NODES[node] for key, node in zip(keys, assignment)}
+    previous[moved] = NODES[other]
+    again, _ = assign_shards(keys, weights, NODES, [1, 1, 1], previous=previous)
+    assert again[0] == other
+    assert sum(a != b for a, b in zip(assignment[1:], again[1:])) <= 1
+
+
+def test_adding_a_node_moves_only_keys_to_it():
+    keys = [f"ch{i}" for i in range(300)]
+    weights = [1] * len(keys)
+    before, _ = assign_shards(keys, weights, NODES, [1, 1, 1], load_factor=2.0)
+    after, _ = assign_shards(keys, weights, NODES + ['p-4'], [1, 1, 1, 1], load_factor=2.0)
+    moved = [(a, b) for a, b in zip(before, after) if a != b]
+    assert moved
+    assert all(b == 3 for _, b in moved)
+
+
+def test_estimate_bitrate():
+    assert estimate_bitrate({'Manifest': 'http://h/a.m3u8', 'VideoList': [
+        {'Desc': "1080p (avc1, 6000Kb/s)"}, {'Desc': "720p (avc1, 3000Kb/s)"}]}) == 6000
+    assert estimate_bitrate({'Manifest': 'http://h/a.mpd'}) == 8000
+    assert estimate_bitrate({'Manifest': 'http://h/a.m3u8', 'ManifestType': 'hls'}) == 4000
+
+
+def test_sharder_writes_every_channel_once_and_keeps_state(tmp_path):
+    channels = [{'Id': f"ch{i}", 'Name': f"Channel {i}", 'Manifest': f'http://h/{i}.m3u8'} for i in range(30)]
+    output = str(tmp_path / 'provider.cfg')
+    state = tmp_path / 'state.json'
+
+    sharder = CfgSharder(3, max_streams=[4], state_file=str(state))
+    counts = sharder.write(output, 'p', channels, create_provider_object)
+    assert sum(counts.values()) == 30
+
+    written = []
+    for index in range(3):
+        with open(shard_path(output, index), encoding='utf-8') as f:
+            provider = json.load(f)
+        assert provider['Id'] == f"p-{index + 1}"
+        assert provider['MaxConcurrentStreams'] == 4
+        written.extend(channel['Id'] for channel in provider['Channels'])
+    assert sorted(written) == sorted(channel['Id'] for channel in channels)
+
+    saved = json.loads(state.read_text(encoding='utf-8'))
+    assert saved['nodes'] == NODES and len(saved['channels']) == 30
+    # Same channels and nodes: nothing moves
+    assert CfgSharder(3, state_file=str(state)).write(output, 'p', channels, create_provider_object) == counts
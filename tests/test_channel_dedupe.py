@@ -0,0 +1,70 @@
+from m3u_o11.channel_dedupe import channel_keys, dedupe_providers, normalize_url
+
+
+def extinf(name, tvg_id=None):
+    attr = f' tvg-id="{tvg_id}"' if tvg_id is not None else ''
+    return f'#EXTINF:-1{attr} group-title="G",{name}'
+
+
+def test_normalize_url():
+    assert normalize_url('HTTPS://Example.COM:443/Live/a.m3u8?b=2&a=1#frag') == 'https://example.com/Live/a.m3u8?a=1&b=2'
+    assert normalize_url('http://example.com:8080/a') == 'http://example.com:8080/a'
+    assert normalize_url('http://user@Host:80/a') == 'http://user@host/a'
+    assert normalize_url('http://h/a?token=1&id=2', {'token'}) == 'http://h/a?id=2'
+    assert normalize_url('not a url') == 'not a url'
+
+
+def test_channel_keys_skip_empty_values():
+    assert channel_keys(extinf("A", ""), 'u', ('url', 'tvg-id', 'name')) == [('url', 'u'), ('name', 'a')]
+    # x-tvg-id is a different attribute
+    line = '#EXTINF:-1 x-tvg-id="x" tvg-id="Real",A'
+    assert ('tvg-id', 'real') in channel_keys(line, 'u', ('tvg-id',))
+
+
+def test_same_url_across_providers_keeps_first():
+    providers = {
+        'one': [(extinf("A"), 'http://h/a')],
+        'two': [(extinf("A copy"), 'HTTP://H:80/a'), (extinf("B"), 'http://h/b')],
+    }
+    deduped, report = dedupe_providers(providers, ('url',))
+    assert deduped == {'one': providers['one'], 'two': [(extinf("B"), 'http://h/b')]}
+    assert report['collapsed'] == 1
+    assert report['duplicates'][0]['kept']['provider'] == 'one'
+    assert report['streams_before'] == report['streams_after'] == 2
+
+
+def test_tvg_id_collision_is_case_insensitive():
+    providers = {'one': [(extinf("A", "CCTV1"), 'http://h/a'), (extinf("B", "cctv1 "), 'http://h/b')]}
+    deduped, report = dedupe_providers(providers, ('url', 'tvg-id'))
+    assert deduped['one'] == [(extinf("A", "CCTV1"), 'http://h/a')]
+    assert report['by_key'] == {'url': 0, 'tvg-id': 1}
+
+
+def test_empty_tvg_ids_do_not_collide():
+    providers = {'one': [(extinf("A", ""), 'http://h/a'), (extinf("B", ""), 'http://h/b')]}
+    deduped, report = dedupe_providers(providers, ('url', 'tvg-id'))
+    assert deduped == providers
+    assert report['collapsed'] == 0
+
+
+def test_name_key_ignores_case_and_punctuation():
+    providers = {'one': [(extinf("CCTV-1 HD"), 'http://h/a')], 'two': [(extinf("cctv 1hd"), 'http://h/b')]}
+    deduped, _ = dedupe_providers(providers, ('name',))
+    assert list(deduped) == ['one']
+
+
+def test_prefer_keeps_the_preferred_copy_and_export_order():
+    providers = {
+        'one': [(extinf("A"), 'http://h/a')],
+        'two': [(extinf("A"), 'http://h/a'), (extinf("B"), 'http://h/b')],
+    }
+    deduped, _ = dedupe_providers(providers, ('url',), prefer=['two'])
+    # 'one' is left empty and dropped, the rest keeps the export's order
+    assert list(deduped) == ['two']
+    assert deduped['two'] == providers['two']
+
+
+def test_ignored_query_parameter():
+    providers = {'one': [(extinf("A"), 'http://h/a?token=1'), (extinf("A"), 'http://h/a?token=2')]}
+    assert dedupe_providers(providers, ('url',))[1]['collapsed'] == 0
+    assert dedupe_providers(providers, ('url',), ignore_params=['token'])[1]['collapsed'] == 1
@@ -0,0 +1,79 @@
+import http.client
+import threading
+
+import pytest
+
+from m3u_o11.o11_server import OutputStore, create_server, parse_range
+
+
+@pytest.mark.parametrize('header, size, expected', [
+    ('bytes=0-9', 100, (0, 9)),
+    ('bytes=10-', 100, (10, 99)),
+    ('bytes=90-200', 100, (90, 99)),
+    ('bytes=99-99', 100, (99, 99)),
+    (' bytes=0-0 ', 100, (0, 0)),
+    # Suffix ranges: the last N bytes, all of them when N is larger
+    ('bytes=-10', 100, (90, 99)),
+    ('bytes=-500', 100, (0, 99)),
+    # Unsatisfiable
+    ('bytes=100-', 100, False),
+    ('bytes=100-200', 100, False),
+    ('bytes=20-10', 100, False),
+    ('bytes=-0', 100, False),
+    ('bytes=0-', 0, False),
+    ('bytes=-10', 0, False),
+    # Not understood: serve the whole file
+    ('bytes=-', 100, None),
+    ('bytes=0-9,20-29', 100, None),
+    ('items=0-9', 100, None),
+    ('bytes=a-b', 100, None),
+])
+def test_parse_range(header, size, expected):
+    assert parse_range(header, size) == expected
+
+
+@pytest.fixture
+def server():
+    store = OutputStore()
+    store.listener('m3u', 'my tv', b'0123456789' * 100)
+    server = create_server(store, '127.0.0.1', 0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def get(server, path, headers=None):
+    conn = http.client.HTTPConnection('127.0.0.1', server.server_address[1], timeout=5)
+    try:
+        conn.request('GET', path, headers=headers or {})
+        response = conn.getresponse()
+        return response.status, dict(response.getheaders()), response.read()
+    finally:
+        conn.close()
+
+
+def test_range_request(server):
+    status, headers, body = get(server, '/my%20tv.m3u', {'Range': 'bytes=-5'})
+    assert status == 206
+    assert headers['Content-Range'] == 'bytes 995-999/1000'
+    assert body == b'56789'
+
+
+def test_unsatisfiable_range_is_416(server):
+    status, headers, body = get(server, '/my%20tv.m3u', {'Range': 'bytes=1000-'})
+    assert status == 416
+    assert headers['Content-Range'] == 'bytes */1000'
+    assert body == b''
+
+
+def test_stale_if_range_sends_everything(server):
+    status, _, body = get(server, '/my%20tv.m3u', {'Range': 'bytes=0-1', 'If-Range': '"stale"'})
+    assert status == 200
+    assert len(body) == 1000
+
+
+def test_removed_output_is_404(server):
+    server.store.listener('m3u', 'my tv', None)
+    assert get(server, '/my%20tv.m3u')[0] == 404